@@ -0,0 +1,52 @@
+# drives FlipDiscDisplay against the pty panel emulator and checks what the panels decoded
+# run from src/: python -m bench.emulated_display
+import argparse
+import sys
+import time
+import numpy as np
+
+from core.emulator import PanelEmulator
+from core.hardware import FlipDiscDisplay
+from utils.constants import HardwareConstants as HC
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial display benchmark against emulated panels")
+    parser.add_argument("--baudrate", type=int, default=HC.SERIAL_BAUDRATE, help="Baud rate to model")
+    parser.add_argument("--frames", type=int, default=60, help="Number of frames to send")
+    parser.add_argument("--fps", type=float, default=30.0, help="Rate at which frames are submitted")
+    parser.add_argument("--atomic", action="store_true", help="Use staged writes with a global refresh")
+    args = parser.parse_args()
+    
+    emulator = PanelEmulator(args.baudrate)
+    port_name = emulator.start()
+    display = FlipDiscDisplay(port_name=port_name, baudrate=args.baudrate)
+    display.initialize()
+    emulator.reset_stats()
+    
+    # a ball crossing the panels, like BouncePattern
+    frame = np.zeros((display.height, display.width), dtype=np.uint8)
+    start = time.monotonic()
+    for i in range(args.frames):
+        frame[:] = 0
+        x = i % (display.width - 1)
+        frame[10:12, x:x + 2] = 1
+        display.send_frame(frame, atomic=args.atomic)
+        time.sleep(max(0.0, start + (i + 1) / args.fps - time.monotonic()))
+    
+    display.cleanup()
+    time.sleep(0.1)
+    elapsed = time.monotonic() - start
+    
+    print(f"port:      {port_name} @ {args.baudrate} baud, {elapsed:.2f} s")
+    print(f"display:   {display.get_stats()}")
+    print(f"transmit:  {display.get_transmit_stats()}")
+    print(f"emulator:  {emulator.get_stats()}")
+    matches = np.array_equal(emulator.get_frame(), frame)
+    print(f"last frame decoded correctly: {matches}")
+    emulator.stop()
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
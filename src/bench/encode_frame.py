@@ -0,0 +1,81 @@
+# micro-benchmark for FrameGenerator.construct_frame
+# run from src/: python -m bench.encode_frame
+import argparse
+import sys
+import time
+import numpy as np
+
+from core.display import FrameGenerator
+from utils.constants import DisplayConstants as DC
+
+
+# the original per-disc encoder, kept as the "before" reference
+def legacy_construct_frame(data):
+    PANEL_IDS = np.array([DC.PANEL_0_ID, DC.PANEL_1_ID, DC.PANEL_2_ID, DC.PANEL_3_ID], dtype=np.uint8)
+    assert(data.shape == (DC.DISPLAY_DISC_WIDTH_COUNT, DC.DISPLAY_DISC_HEIGHT_COUNT))
+    display_frame = np.empty((0, DC.FRAME_LENGTH), dtype=np.uint8)
+    
+    for panel in range(0, DC.DISPLAY_PANEL_WIDTH_COUNT):
+        panel_sub_frame = np.empty((0, DC.PANEL_ROW_HEIGHT_COUNT), dtype=np.uint8)
+        panel_frame = np.empty((0, DC.FRAME_LENGTH), dtype=np.uint8)
+        panel_frame = np.append(panel_frame, [DC.FRAME_HEADER, DC.FRAME_COMMAND, PANEL_IDS[panel], DC.FRAME_TAIL])
+        panel_data = data[0:DC.PANEL_ROW_HEIGHT_COUNT, panel*DC.ROW_DISC_WIDTH_COUNT:(panel+1)*DC.ROW_DISC_WIDTH_COUNT]
+        
+        for column in range(0, DC.PANEL_ROW_HEIGHT_COUNT):
+            column_data = panel_data[column, :]
+            column_data_int = 0
+            for disc in column_data:
+                column_data_int = (column_data_int << 1) | disc
+            panel_sub_frame = np.append(panel_sub_frame, np.array(column_data_int))
+        
+        panel_frame = np.insert(panel_frame, slice(DC.FRAME_COMMAND_START_INDEX, DC.FRAME_COMMAND_END_INDEX), panel_sub_frame)
+        panel_frame = panel_frame.astype(np.uint8)
+        display_frame = np.concatenate((display_frame, [panel_frame]), axis=0)
+    
+    return display_frame
+
+
+def random_frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (count, DC.DISPLAY_DISC_HEIGHT_COUNT, DC.DISPLAY_DISC_WIDTH_COUNT)
+    return rng.integers(0, 2, size=shape, dtype=np.uint8)
+
+
+def encodes_per_second(encode, frames, duration):
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < duration:
+        for frame in frames:
+            encode(frame)
+        count += len(frames)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FrameGenerator encode benchmark")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds to run each encoder")
+    parser.add_argument("--frames", type=int, default=64, help="Number of distinct random frames")
+    args = parser.parse_args()
+    
+    frames = random_frames(args.frames)
+    frame_generator = FrameGenerator()
+    
+    # the vectorized encoder must produce exactly the legacy bytes
+    for frame in frames:
+        if not np.array_equal(legacy_construct_frame(frame), frame_generator.construct_frame(frame)):
+            print("Error: encoder output differs from legacy encoder")
+            return 1
+    
+    before = encodes_per_second(legacy_construct_frame, frames, args.duration)
+    after = encodes_per_second(frame_generator.construct_frame, frames, args.duration)
+    
+    print(f"legacy:     {before:12.0f} encodes/s  ({1e6 / before:8.2f} us/frame)")
+    print(f"vectorized: {after:12.0f} encodes/s  ({1e6 / after:8.2f} us/frame)")
+    print(f"speedup:    {after / before:12.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
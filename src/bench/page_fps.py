@@ -0,0 +1,49 @@
+# runs patterns through the headless simulator as fast as they go, including the FrameGenerator encode/decode
+# run from src/: python -m bench.page_fps [--pattern waves ...]
+import argparse
+import sys
+import time
+
+from core.simulator import FlipSimDisplay
+from pages.patterns import PATTERNS
+
+
+def run_pattern(display, pattern_class, duration):
+    pattern = pattern_class(display)
+    pattern.initialize()
+    display.stats.reset()
+    
+    update_time = 0.0
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        start = time.perf_counter()
+        pattern.update()
+        frame = pattern.render()
+        update_time += time.perf_counter() - start
+        display.send_frame(frame)
+    
+    pattern.cleanup()
+    stats = display.get_stats()
+    stats["update_us_mean"] = round(update_time / max(1, stats["frames"]) * 1e6, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pattern frame rate benchmark on the headless simulator")
+    parser.add_argument("--pattern", action="append", choices=list(PATTERNS.keys()), help="Pattern to run, default all")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds to run each pattern")
+    args = parser.parse_args()
+    
+    display = FlipSimDisplay(headless=True)
+    display.initialize()
+    
+    for key in args.pattern or PATTERNS.keys():
+        stats = run_pattern(display, PATTERNS[key][0], args.duration)
+        print(f"{key:10s} {stats}")
+    
+    display.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
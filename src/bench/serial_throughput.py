@@ -0,0 +1,72 @@
+# measures achieved bytes/s and frames/s of the serial transmit path against a pty
+# run from src/: python -m bench.serial_throughput
+import argparse
+import os
+import sys
+import threading
+import time
+import tty
+import numpy as np
+
+from core.display import FrameGenerator
+from core.serial_bus import SerialBus
+from utils.constants import HardwareConstants as HC
+
+
+def open_pty():
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    return master_fd, slave_fd, os.ttyname(slave_fd)
+
+
+def drain(master_fd, received, stop_event):
+    while not stop_event.is_set():
+        try:
+            received[0] += len(os.read(master_fd, 4096))
+        except OSError:
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial transmit throughput benchmark")
+    parser.add_argument("--baudrate", type=int, default=HC.SERIAL_BAUDRATE, help="Baud rate to pace for")
+    parser.add_argument("--frames", type=int, default=100, help="Number of full frames to send")
+    args = parser.parse_args()
+    
+    master_fd, slave_fd, port_name = open_pty()
+    received = [0]
+    stop_event = threading.Event()
+    reader = threading.Thread(target=drain, args=(master_fd, received, stop_event), daemon=True)
+    reader.start()
+    
+    bus = SerialBus(port_name, args.baudrate)
+    bus.open()
+    frame_generator = FrameGenerator()
+    rng = np.random.default_rng(0)
+    
+    start = time.monotonic()
+    for _ in range(args.frames):
+        frame = rng.integers(0, 2, size=(28, 28), dtype=np.uint8)
+        frames = frame_generator.construct_frame(frame)
+        bus.write(frames.tobytes(), len(frames))
+    bus.wait_until_idle()
+    elapsed = time.monotonic() - start
+    
+    bus.close()
+    stop_event.set()
+    os.close(slave_fd)
+    os.close(master_fd)
+    
+    stats = bus.stats
+    frame_bytes = stats.bytes_sent / max(1, stats.frames_sent)
+    wire_limit = args.baudrate / HC.SERIAL_BITS_PER_BYTE
+    print(f"port:        {port_name} @ {args.baudrate} baud")
+    print(f"sent:        {stats.bytes_sent} bytes in {stats.frames_sent} frames ({elapsed:.2f} s)")
+    print(f"received:    {received[0]} bytes")
+    print(f"throughput:  {stats.bytes_sent / elapsed:10.1f} bytes/s  (wire limit {wire_limit:.1f})")
+    print(f"frame rate:  {stats.frames_sent / elapsed:10.2f} frames/s (wire limit {wire_limit / frame_bytes:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
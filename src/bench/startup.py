@@ -0,0 +1,67 @@
+# time from launching the application to its first frame on the display
+# run from src/: python -m bench.startup [--runs 5] [-- main.py arguments, default --headless]
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_FRAME_PATTERN = re.compile(r"First frame sent ([0-9.]+)s after start")
+
+
+def run_once(main_args, timeout):
+    # main.py reports how long main() took, the rest is interpreter start and module imports
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"] + main_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    
+    try:
+        deadline = start + timeout
+        last_line = "(none)"
+        for line in process.stdout:
+            match = FIRST_FRAME_PATTERN.search(line)
+            if match:
+                total = time.perf_counter() - start
+                return total, float(match.group(1))
+            last_line = line.rstrip()
+            if time.perf_counter() > deadline:
+                break
+        print(f"No first frame reported, last output: {last_line}")
+        return None
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Application cold start to first frame")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the first frame")
+    parser.add_argument("main_args", nargs="*", help="Arguments for main.py (put after --)")
+    args = parser.parse_args()
+    main_args = args.main_args or ["--headless"]
+    
+    totals = []
+    in_main = []
+    for run in range(args.runs):
+        result = run_once(main_args, args.timeout)
+        if result is None:
+            return 1
+        total, main_time = result
+        totals.append(total)
+        in_main.append(main_time)
+        print(f"run {run + 1}: first frame after {total:.3f}s ({total - main_time:.3f}s interpreter and imports, {main_time:.3f}s in main)")
+    
+    print(f"median first frame {statistics.median(totals):.3f}s, "
+          f"imports {statistics.median(t - m for t, m in zip(totals, in_main)):.3f}s, "
+          f"main {statistics.median(in_main):.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
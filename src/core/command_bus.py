@@ -0,0 +1,92 @@
+import threading
+import time
+import traceback
+
+from core.metrics import metrics
+
+
+class Command:
+    __slots__ = ("work", "args", "key", "posted_at")
+    
+    def __init__(self, work, args, key, posted_at):
+        self.work = work
+        self.args = args
+        self.key = key
+        self.posted_at = posted_at  # perf_counter time of the first post, kept when coalesced
+
+
+class CommandBus:
+    # calls posted from input, GPIO and MQTT threads and run by the frame loop in drain(), so
+    # what they change is only changed from the loop's thread and never mid-render. A command
+    # posted with the same key as the one at the tail of the queue is coalesced into it: it
+    # replaces it, or with merge(old_args, new_args) is combined with it, so a burst of input
+    # costs one call. The lock is only held to append or swap out the queue, never while a
+    # command runs
+    def __init__(self, on_post=None):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.on_post = on_post  # e.g. to wake an idle frame loop
+        self.current = None  # command drain() is running, None outside of it
+        
+        self.posted = 0
+        self.coalesced = 0
+        self.executed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.latency_timer = metrics.stage("commands.latency")
+        self.run_timer = metrics.stage("commands.run")
+    
+    def post(self, work, *args, key=None, merge=None):
+        now = time.perf_counter()
+        with self.lock:
+            self.posted += 1
+            tail = self.pending[-1] if self.pending else None
+            if key is not None and tail is not None and tail.key == key:
+                tail.work = work
+                tail.args = merge(tail.args, args) if merge is not None else args
+                self.coalesced += 1
+            else:
+                self.pending.append(Command(work, args, key, now))
+                self.max_depth = max(self.max_depth, len(self.pending))
+        
+        if self.on_post is not None:
+            self.on_post()
+    
+    def drain(self):
+        """Run the commands posted so far in order, returns how many ran. Commands posted while
+        draining wait for the next call."""
+        if not self.pending:
+            return 0
+        
+        with self.lock:
+            commands, self.pending = self.pending, []
+        
+        for command in commands:
+            self.current = command
+            start = time.perf_counter()
+            self.latency_timer.record(start - command.posted_at)
+            try:
+                command.work(*command.args)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error running command '{getattr(command.work, '__name__', command.work)}': {e}")
+                traceback.print_exc()
+            self.run_timer.record(time.perf_counter() - start)
+            self.executed += 1
+        
+        self.current = None
+        return len(commands)
+    
+    def get_stats(self):
+        return {
+            "depth": len(self),
+            "max_depth": self.max_depth,
+            "posted": self.posted,
+            "coalesced": self.coalesced,
+            "executed": self.executed,
+            "errors": self.errors,
+        }
+    
+    def __len__(self):
+        with self.lock:
+            return len(self.pending)
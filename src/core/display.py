@@ -1,5 +1,8 @@
+import time
 import numpy as np
 from abc import ABC, abstractmethod
+from core.metrics import metrics
+from core.topology import Topology
 from utils.constants import DisplayConstants as DC
 
 class Display(ABC):
@@ -8,19 +11,28 @@ class Display(ABC):
         self.height = height
         self.frame_buffer = np.zeros((height, width), dtype=np.uint8)
         self.prev_frame_buffer = np.zeros((height, width), dtype=np.uint8)
+        self.flip_limiter = None  # adapters that support it apply it before showing a frame
     
     @abstractmethod
     def initialize(self):
         pass
     
     @abstractmethod
-    def send_frame(self, frame_matrix):
+    def send_frame(self, frame_matrix, atomic=None):
         pass
     
     @abstractmethod
     def cleanup(self):
         pass
     
+    def service(self):
+        # adapters with work between frames (deferred flips, discs still landing) do it here
+        pass
+    
+    def time_until_service(self):
+        """Seconds until service() has work to do, None when it has none."""
+        return None
+    
     def clear(self):
         self.frame_buffer = np.zeros((self.height, self.width), dtype=np.uint8)
         self.send_frame(self.frame_buffer)
@@ -36,36 +48,120 @@ class Display(ABC):
 
 
 class FrameGenerator:
-    @staticmethod
-    def construct_frame(data):
-        PANEL_IDS = np.array([DC.PANEL_0_ID, DC.PANEL_1_ID, DC.PANEL_2_ID, DC.PANEL_3_ID], dtype=np.uint8)
-        assert(data.shape == (DC.DISPLAY_DISC_WIDTH_COUNT, DC.DISPLAY_DISC_HEIGHT_COUNT))
-        display_frame = np.empty((0, DC.FRAME_LENGTH), dtype=np.uint8)
+    # encodes the panels of one bus into a preallocated packet buffer. Headers, addresses
+    # and tails never change so they are stamped once and only the column bytes are encoded
+    def __init__(self, topology=None, bus=None):
+        topology = topology or Topology.default()
+        panels = topology.panels if bus is None else topology.bus_panels[bus]
+        columns = {panel.columns for panel in panels}
+        if len(columns) != 1:
+            raise ValueError("FrameGenerator needs panels of a single length")
+        
+        self.shape = (topology.height, topology.width)
+        self.panel_count = len(panels)
+        self.panel_ids = np.array([panel.address for panel in panels], dtype=np.uint8)
+        self.column_count = columns.pop()
+        self.commands = DC.DATA_COMMANDS[self.column_count]
+        self.frame_length = self.column_count + 4
+        
+        self.frame = np.empty((self.panel_count, self.frame_length), dtype=np.uint8)
+        self.frame[:, 0] = DC.FRAME_HEADER
+        self.frame[:, 1] = self.commands[0]
+        self.frame[:, 2] = self.panel_ids
+        self.frame[:, self.frame_length - 1] = DC.FRAME_TAIL
+        self.column_data = self.frame[:, DC.FRAME_COMMAND_START_INDEX:self.frame_length - 1]
+        self.refresh_packet = bytes([DC.FRAME_HEADER, DC.REFRESH_COMMAND, DC.FRAME_TAIL])
+        
+        # first disc of each panel row is the most significant bit of its column byte
+        self.disc_weights = (1 << np.arange(DC.ROW_DISC_WIDTH_COUNT - 1, -1, -1)).astype(np.uint8)
+        self.discs = np.empty(self.shape, dtype=bool)
+        self.disc_index = np.stack([panel.disc_index(topology.width) for panel in panels])
+        self.panel_discs = np.empty(self.disc_index.shape, dtype=bool)
+        
+        self.encode_timer = metrics.stage("frame.encode")
+    
+    def construct_frame(self, data, refresh=True):
+        """Encode a frame into one packet per panel.
+        
+        With refresh=False the panels hold the data until refresh_packet is sent.
+        The returned array is reused by the next call, copy it if it needs to be kept.
+        """
+        assert(data.shape == self.shape)
+        start = time.perf_counter()
+        self.frame[:, 1] = self.commands[0] if refresh else self.commands[1]
+        np.not_equal(data, 0, out=self.discs)
+        np.take(self.discs.ravel(), self.disc_index, out=self.panel_discs)
+        np.matmul(self.panel_discs, self.disc_weights, out=self.column_data)
+        self.encode_timer.record(time.perf_counter() - start)
+        return self.frame
+    
+    def decode_frame(self, frames, out=None):
+        # inverse of construct_frame: unpack the column bytes back onto the canvas
+        if out is None:
+            out = np.zeros(self.shape, dtype=np.uint8)
+        column_data = frames[:, DC.FRAME_COMMAND_START_INDEX:self.frame_length - 1]
+        discs = np.unpackbits(column_data[..., None], axis=-1)[..., 8 - DC.ROW_DISC_WIDTH_COUNT:]
+        out.reshape(-1)[self.disc_index] = discs
+        return out
+
+
+class PanelDiff:
+    # tracks the panel packets the display has acknowledged so only changed panels are resent
+    def __init__(self, panel_count=DC.DISPLAY_PANEL_WIDTH_COUNT, frame_length=DC.FRAME_LENGTH, full_refresh_interval=0):
+        self.shown = np.zeros((panel_count, frame_length), dtype=np.uint8)
+        self.shown_valid = False
+        self.full_refresh_interval = full_refresh_interval  # seconds, 0 disables
+        self.last_full_refresh_time = 0
         
-        for panel in range(0, DC.DISPLAY_PANEL_WIDTH_COUNT):
-            panel_sub_frame = np.empty((0, DC.PANEL_ROW_HEIGHT_COUNT), dtype=np.uint8)
-            panel_frame = np.empty((0, DC.FRAME_LENGTH), dtype=np.uint8)
-            panel_frame = np.append(panel_frame, [DC.FRAME_HEADER, DC.FRAME_COMMAND, PANEL_IDS[panel], DC.FRAME_TAIL])
-            panel_data = data[0:DC.PANEL_ROW_HEIGHT_COUNT, panel*DC.ROW_DISC_WIDTH_COUNT:(panel+1)*DC.ROW_DISC_WIDTH_COUNT]
-            
-            for column in range(0, DC.PANEL_ROW_HEIGHT_COUNT):
-                column_data = panel_data[column, :]
-                column_data_int = 0
-                for disc in column_data:
-                    column_data_int = (column_data_int << 1) | disc
-                panel_sub_frame = np.append(panel_sub_frame, np.array(column_data_int))
-            
-            panel_frame = np.insert(panel_frame, slice(DC.FRAME_COMMAND_START_INDEX, DC.FRAME_COMMAND_END_INDEX), panel_sub_frame)
-            panel_frame = panel_frame.astype(np.uint8)
-            display_frame = np.concatenate((display_frame, [panel_frame]), axis=0)
+        self.frames_skipped = 0
+        self.panels_sent = 0
+        self.panels_skipped = 0
+    
+    def changed_panels(self, frames):
+        now = time.monotonic()
+        if not self.shown_valid or (self.full_refresh_interval > 0 and
+                now - self.last_full_refresh_time >= self.full_refresh_interval):
+            self.last_full_refresh_time = now
+            return np.arange(len(frames))
         
-        return display_frame
+        # only the column bytes count, the command byte changes with the refresh mode
+        columns = slice(DC.FRAME_COMMAND_START_INDEX, frames.shape[1] - 1)
+        return np.flatnonzero(np.any(frames[:, columns] != self.shown[:, columns], axis=1))
+    
+    def acknowledge(self, frames, panels):
+        self.shown[panels] = frames[panels]
+        if len(panels) == len(frames):
+            self.shown_valid = True
+        
+        if len(panels) == 0:
+            self.frames_skipped += 1
+        self.panels_sent += len(panels)
+        self.panels_skipped += len(frames) - len(panels)
+    
+    def invalidate(self):
+        self.shown_valid = False
 
 
-def create_display_adapter(use_simulator=False):
-    if use_simulator:
+def create_display_adapter(use_simulator=False, topology=None, record_path=None, tee=False, headless=False, bus_timing=False):
+    if tee:
+        # hardware always, plus the simulator and recorder when requested
+        from core.hardware import FlipDiscDisplay
+        from core.tee import TeeDisplay
+        displays = [FlipDiscDisplay(topology=topology)]
+        if use_simulator:
+            from core.simulator import FlipSimDisplay
+            displays.append(FlipSimDisplay(topology=topology, headless=headless, bus_timing=bus_timing))
+        if record_path is not None:
+            from core.recorder import RecordingDisplay
+            displays.append(RecordingDisplay(record_path, topology=topology))
+        return TeeDisplay(displays)
+    
+    if record_path is not None:
+        from core.recorder import RecordingDisplay
+        return RecordingDisplay(record_path, topology=topology)
+    elif use_simulator:
         from core.simulator import FlipSimDisplay
-        return FlipSimDisplay()
+        return FlipSimDisplay(topology=topology, headless=headless, bus_timing=bus_timing)
     else:
         from core.hardware import FlipDiscDisplay
-        return FlipDiscDisplay()
\ No newline at end of file
+        return FlipDiscDisplay(topology=topology)
\ No newline at end of file
@@ -0,0 +1,240 @@
+# virtual Alfazeta panels behind a pseudo-terminal, for exercising the serial path without the RS485 hat
+# run from src/: python -m core.emulator
+import argparse
+import os
+import sys
+import threading
+import time
+import tty
+import numpy as np
+
+from core.topology import Topology
+from utils.constants import DisplayConstants as DC
+from utils.constants import HardwareConstants as HC
+
+# parser states
+WAIT_HEADER = 0
+WAIT_COMMAND = 1
+WAIT_ADDRESS = 2
+WAIT_DATA = 3
+WAIT_TAIL = 4
+
+
+class PanelEmulator:
+    def __init__(self, baudrate=HC.SERIAL_BAUDRATE, topology=None, history=4096):
+        self.baudrate = baudrate
+        self.byte_time = HC.SERIAL_BITS_PER_BYTE / baudrate
+        self.topology = topology or Topology.default()
+        self.port_name = None
+        self.master_fd = None
+        self.slave_fd = None
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+        
+        self.data_lengths = {}
+        for columns, (refresh_command, hold_command) in DC.DATA_COMMANDS.items():
+            self.data_lengths[refresh_command] = (columns, True)
+            self.data_lengths[hold_command] = (columns, False)
+        
+        # per panel address: shown discs, discs held for the next refresh, time each disc became visible
+        self.shown = {}
+        self.held = {}
+        self.visible_time = {}
+        for panel in self.topology.panels:
+            self._add_panel(panel.address, panel.columns)
+        
+        self.history = history
+        self.reset_stats()
+        self._reset_parser()
+    
+    def _add_panel(self, address, columns):
+        self.shown[address] = np.zeros((columns, DC.ROW_DISC_WIDTH_COUNT), dtype=np.uint8)
+        self.held[address] = None
+        self.visible_time[address] = np.zeros((columns, DC.ROW_DISC_WIDTH_COUNT), dtype=np.float64)
+    
+    def _reset_parser(self):
+        self.state = WAIT_HEADER
+        self.command = None
+        self.address = None
+        self.data = bytearray()
+        self.expected_length = 0
+        self.packet_start = 0.0
+    
+    def reset_stats(self):
+        with self.lock:
+            self.start_time = time.monotonic()
+            self.bus_idle_time = 0.0  # modeled time at which the last received byte has left the wire
+            self.bytes_received = 0
+            self.packets_received = 0
+            self.refreshes_received = 0
+            self.malformed_packets = 0
+            self.latencies = np.zeros(self.history, dtype=np.float64)
+            self.latency_count = 0
+    
+    def start(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        self.port_name = os.ttyname(self.slave_fd)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="panel-emulator")
+        self.thread.daemon = True
+        self.thread.start()
+        return self.port_name
+    
+    def stop(self):
+        self.running = False
+        for fd in (self.slave_fd, self.master_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.master_fd = None
+        self.slave_fd = None
+    
+    def _run(self):
+        while self.running:
+            try:
+                chunk = os.read(self.master_fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            
+            received_time = time.monotonic()
+            with self.lock:
+                # the pty delivers instantly, so model each byte leaving the wire at the configured baud rate
+                wire_start = max(received_time, self.bus_idle_time)
+                for i, byte in enumerate(chunk):
+                    self._feed(byte, received_time, wire_start + (i + 1) * self.byte_time)
+                self.bus_idle_time = wire_start + len(chunk) * self.byte_time
+                self.bytes_received += len(chunk)
+    
+    def _feed(self, byte, received_time, arrival_time):
+        if self.state == WAIT_HEADER:
+            if byte == DC.FRAME_HEADER:
+                self.state = WAIT_COMMAND
+                self.packet_start = received_time
+            else:
+                self.malformed_packets += 1
+        elif self.state == WAIT_COMMAND:
+            if byte == DC.REFRESH_COMMAND:
+                self.command = byte
+                self.state = WAIT_TAIL
+            elif byte in self.data_lengths:
+                self.command = byte
+                self.expected_length = self.data_lengths[byte][0]
+                self.state = WAIT_ADDRESS
+            else:
+                self._malformed(byte)
+        elif self.state == WAIT_ADDRESS:
+            self.address = byte
+            self.data = bytearray()
+            self.state = WAIT_DATA
+        elif self.state == WAIT_DATA:
+            if byte & 0x80:
+                # control bytes never appear in column data, the packet was cut short
+                self._malformed(byte)
+                return
+            self.data.append(byte)
+            if len(self.data) == self.expected_length:
+                self.state = WAIT_TAIL
+        elif self.state == WAIT_TAIL:
+            if byte == DC.FRAME_TAIL:
+                self._complete_packet(arrival_time)
+                self._reset_parser()
+            else:
+                self._malformed(byte)
+    
+    def _malformed(self, byte):
+        self.malformed_packets += 1
+        self._reset_parser()
+        # the offending byte may start the next packet
+        if byte == DC.FRAME_HEADER:
+            self.state = WAIT_COMMAND
+    
+    def _complete_packet(self, arrival_time):
+        self.packets_received += 1
+        self.latencies[self.latency_count % self.history] = arrival_time - self.packet_start
+        self.latency_count += 1
+        
+        if self.command == DC.REFRESH_COMMAND:
+            self.refreshes_received += 1
+            for address, held in self.held.items():
+                if held is not None:
+                    self._show(address, held, arrival_time)
+                    self.held[address] = None
+            return
+        
+        columns, refresh = self.data_lengths[self.command]
+        if self.address not in self.shown or len(self.shown[self.address]) != columns:
+            self._add_panel(self.address, columns)
+        
+        # unpack the 7-bit column bytes, most significant bit first
+        discs = np.unpackbits(np.frombuffer(bytes(self.data), dtype=np.uint8)[:, None], axis=1)[:, 1:]
+        if refresh:
+            self._show(self.address, discs, arrival_time)
+        else:
+            self.held[self.address] = discs
+    
+    def _show(self, address, discs, arrival_time):
+        changed = self.shown[address] != discs
+        self.visible_time[address][changed] = arrival_time
+        self.shown[address] = discs
+    
+    def get_frame(self):
+        # decoded disc state laid out on the topology canvas
+        with self.lock:
+            frame = np.zeros((self.topology.height, self.topology.width), dtype=np.uint8)
+            for panel in self.topology.panels:
+                frame[panel.y:panel.y + panel.columns, panel.x:panel.x + panel.discs] = self.shown[panel.address]
+            return frame
+    
+    def get_visible_times(self, address):
+        with self.lock:
+            return self.visible_time[address].copy()
+    
+    def get_stats(self):
+        with self.lock:
+            elapsed = max(self.bus_idle_time, time.monotonic()) - self.start_time
+            latencies = self.latencies[:min(self.latency_count, self.history)]
+            stats = {
+                "bytes_received": self.bytes_received,
+                "packets_received": self.packets_received,
+                "refreshes_received": self.refreshes_received,
+                "malformed_packets": self.malformed_packets,
+                "bytes_per_second": round(self.bytes_received / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+            if len(latencies) > 0:
+                stats["latency_ms_p50"] = round(float(np.percentile(latencies, 50)) * 1000, 2)
+                stats["latency_ms_max"] = round(float(latencies.max()) * 1000, 2)
+            return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual Alfazeta panels on a pty")
+    parser.add_argument("--baudrate", type=int, default=HC.SERIAL_BAUDRATE, help="Baud rate to model")
+    parser.add_argument("--topology", help="JSON file describing panel positions, addresses and buses")
+    args = parser.parse_args()
+    
+    topology = Topology.from_file(args.topology) if args.topology else None
+    emulator = PanelEmulator(args.baudrate, topology)
+    port_name = emulator.start()
+    print(f"Emulating panels on {port_name} @ {args.baudrate} baud")
+    
+    try:
+        while True:
+            time.sleep(1.0)
+            print(emulator.get_stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
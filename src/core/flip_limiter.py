@@ -0,0 +1,113 @@
+import numpy as np
+from core.topology import Topology
+from utils.constants import HardwareConstants as HC
+
+FLIP_ORDERS = ("raster", "random", "nearest")
+
+
+def bus_flip_budget(topology, bus, max_flips=HC.MAX_FLIPS_PER_FRAME):
+    # the buses transmit in parallel and share one supply, so a per-bus limiter gets a share of
+    # the frame budget in proportion to its panels and the shares add up to at most the budget.
+    # Every bus keeps at least one flip so it still converges
+    if max_flips <= 0:
+        return 0
+    return max(1, max_flips * len(topology.bus_panels[bus]) // len(topology.panels))
+
+
+class FlipLimiter:
+    # caps how many discs physically flip per frame and per panel. Flips over the cap are
+    # deferred to the following frames, so the shown state converges on the requested frame
+    def __init__(self, max_flips=HC.MAX_FLIPS_PER_FRAME, max_panel_flips=HC.MAX_FLIPS_PER_PANEL,
+                 order=HC.FLIP_ORDER, topology=None, bus=None, seed=None):
+        if order not in FLIP_ORDERS:
+            raise ValueError(f"Unknown flip order '{order}', expected one of {FLIP_ORDERS}")
+        
+        topology = topology or Topology.default()
+        panels = topology.panels if bus is None else topology.bus_panels[bus]
+        
+        self.max_flips = max_flips  # 0 disables the frame cap
+        self.max_panel_flips = max_panel_flips  # 0 disables the panel cap
+        self.order = order
+        self.rng = np.random.default_rng(seed)
+        
+        # panel of every disc on the canvas, discs of other buses are never touched
+        self.panel_index = np.full(topology.height * topology.width, -1, dtype=np.int32)
+        for index, panel in enumerate(panels):
+            self.panel_index[panel.disc_index(topology.width).ravel()] = index
+        self.panel_count = len(panels)
+        self.width = topology.width
+        
+        self.shown = np.zeros((topology.height, topology.width), dtype=np.uint8)
+        self.last_flip_center = np.array([(topology.height - 1) / 2, (topology.width - 1) / 2])
+        
+        self.pending = 0
+        self.frames_limited = 0
+        self.flips_sent = 0
+        self.flips_deferred = 0  # summed over frames, one disc deferred twice counts twice
+        self.max_pending = 0
+    
+    def reset(self, shown=None):
+        self.shown[:] = 0 if shown is None else shown
+        self.pending = 0
+    
+    def apply(self, frame):
+        """Return the frame to show now, moving the shown state towards frame within the caps."""
+        target = (np.asarray(frame) != 0).ravel()
+        shown = self.shown.ravel()
+        flips = np.flatnonzero((target != shown) & (self.panel_index >= 0))
+        
+        selected = self._select(flips)
+        shown[selected] = target[selected]
+        
+        self.pending = len(flips) - len(selected)
+        self.flips_sent += len(selected)
+        if self.pending > 0:
+            self.frames_limited += 1
+            self.flips_deferred += self.pending
+            self.max_pending = max(self.max_pending, self.pending)
+        
+        if len(selected) > 0:
+            rows, cols = np.divmod(selected, self.width)
+            self.last_flip_center = np.array([rows.mean(), cols.mean()])
+        
+        return self.shown
+    
+    def _select(self, flips):
+        within_frame_cap = self.max_flips <= 0 or len(flips) <= self.max_flips
+        if self.max_panel_flips <= 0 and within_frame_cap:
+            return flips
+        
+        flips = self._ordered(flips)
+        
+        if self.max_panel_flips > 0:
+            # rank of each flip within its panel, in priority order
+            panels = self.panel_index[flips]
+            order = np.argsort(panels, kind='stable')
+            sorted_panels = panels[order]
+            starts = np.searchsorted(sorted_panels, sorted_panels, side='left')
+            rank = np.empty(len(flips), dtype=np.int64)
+            rank[order] = np.arange(len(flips)) - starts
+            flips = flips[rank < self.max_panel_flips]
+        
+        if self.max_flips > 0:
+            flips = flips[:self.max_flips]
+        return flips
+    
+    def _ordered(self, flips):
+        if self.order == "random":
+            return self.rng.permutation(flips)
+        if self.order == "nearest":
+            # closest to where the previous frame flipped first, so sweeps stay contiguous
+            rows, cols = np.divmod(flips, self.width)
+            distance = (rows - self.last_flip_center[0]) ** 2 + (cols - self.last_flip_center[1]) ** 2
+            return flips[np.argsort(distance, kind='stable')]
+        return flips
+    
+    def get_stats(self):
+        return {
+            "pending_flips": self.pending,
+            "max_pending_flips": self.max_pending,
+            "frames_limited": self.frames_limited,
+            "flips_sent": self.flips_sent,
+            "flips_deferred": self.flips_deferred,
+        }
@@ -1,50 +1,105 @@
-import time
-from core.display import Display, FrameGenerator
+import numpy as np
+from core.display import Display, FrameGenerator, PanelDiff
+from core.flip_limiter import FlipLimiter, bus_flip_budget
+from core.serial_bus import SerialBus, SerialWriter
+from core.topology import Topology
 from utils.constants import HardwareConstants as HC
 
-import serial
-import RPi.GPIO as GPIO
-import busio
-import board
-import adafruit_ads1x15.ads1015 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
-import adafruit_vl6180x
+# the serial display also runs off the Pi (e.g. against core.emulator), without GPIO or I2C
+try:
+    import RPi.GPIO as GPIO
+except ImportError as e:
+    print(f"Warning: Raspberry Pi hardware libraries not available: {e}")
+    GPIO = None
 
-i2c = busio.I2C(board.SCL, board.SDA)
+i2c = None
+
+def get_i2c():
+    # the bus and its libraries are only brought up once a sensor needs them
+    global i2c
+    if i2c is None:
+        import busio
+        import board
+        i2c = busio.I2C(board.SCL, board.SDA)
+    return i2c
 
 class FlipDiscDisplay(Display):    
-    def __init__(self):
-        super().__init__()
-        self.serial_port = None
-        self.frame_builder = FrameGenerator()
+    def __init__(self, port_name=None, baudrate=HC.SERIAL_BAUDRATE, topology=None):
+        self.topology = topology or Topology.default()
+        super().__init__(self.topology.width, self.topology.height)
+        
+        port_names = list(self.topology.port_names)
+        if port_name is not None:
+            port_names[0] = port_name
+        
+        # every bus gets its own encoder and writer thread so the buses transmit in parallel
+        self.writers = []
+        for bus, bus_port_name in enumerate(port_names):
+            if not self.topology.bus_panels[bus]:
+                continue
+            frame_builder = FrameGenerator(self.topology, bus)
+            panel_diff = PanelDiff(frame_builder.panel_count, frame_builder.frame_length, HC.FULL_REFRESH_INTERVAL)
+            serial_bus = SerialBus(bus_port_name, baudrate)
+            flip_limiter = None
+            if HC.MAX_FLIPS_PER_FRAME > 0 or HC.MAX_FLIPS_PER_PANEL > 0:
+                flip_limiter = FlipLimiter(bus_flip_budget(self.topology, bus), topology=self.topology, bus=bus)
+            self.writers.append(SerialWriter(serial_bus, frame_builder, panel_diff, f"serial-writer-{bus}", flip_limiter))
     
     def initialize(self):
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(HC.PIN_EN_485, GPIO.OUT)
-        GPIO.output(HC.PIN_EN_485, GPIO.HIGH)
+        if GPIO is not None:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(HC.PIN_EN_485, GPIO.OUT)
+            GPIO.output(HC.PIN_EN_485, GPIO.HIGH)
         
-        self.serial_port = serial.Serial(
-            port=HC.SERIAL_PORT_NAME,
-            baudrate=HC.SERIAL_BAUDRATE,
-            timeout=1,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            bytesize=serial.EIGHTBITS
-        )
+        for writer in self.writers:
+            writer.serial_bus.open()
+            writer.panel_diff.invalidate()
+            if writer.flip_limiter is not None:
+                writer.flip_limiter.reset()
+            writer.start()
         self.clear()
     
-    def send_frame(self, frame_matrix):
-        frames = self.frame_builder.construct_frame(frame_matrix)
+    def send_frame(self, frame_matrix, atomic=None):
+        # returns immediately, the writer threads encode and transmit their panels.
+        # atomic stages every changed panel and shows them together, None uses HC.ATOMIC_REFRESH.
+        # Each bus sends its own refresh from its own writer, so atomic only holds within a bus:
+        # on a multi-bus topology the buses can still show the frame a few packets apart
+        frame_matrix = np.array(frame_matrix, dtype=np.uint8)
+        for writer in self.writers:
+            writer.submit(frame_matrix, atomic, copy=False)
+    
+    def get_stats(self):
+        stats = {}
+        for writer in self.writers:
+            for key, value in writer.get_stats().items():
+                stats[key] = stats.get(key, 0) + value
         
-        for frame in frames:
-            frame_bytes = bytearray(frame)
-            self.serial_port.write(frame_bytes)
-            time.sleep(0.01)
+        flip_stats = self.get_flip_stats()
+        if flip_stats:
+            stats["flips"] = flip_stats
+        return stats
+    
+    def get_flip_stats(self):
+        # summed over the buses' limiters, the peak pending count is the largest of any bus
+        stats = {}
+        for writer in self.writers:
+            if writer.flip_limiter is not None:
+                for key, value in writer.flip_limiter.get_stats().items():
+                    stats[key] = max(stats.get(key, 0), value) if key.startswith("max_") else stats.get(key, 0) + value
+        return stats
+    
+    def get_transmit_stats(self):
+        return {writer.serial_bus.port_name: writer.serial_bus.stats.summary() for writer in self.writers}
     
     def cleanup(self):
-        if self.serial_port is not None and self.serial_port.is_open:
-            self.serial_port.close()
-            GPIO.cleanup()
+        for writer in self.writers:
+            writer.stop()
+        
+        if any(writer.serial_bus.is_open() for writer in self.writers):
+            for writer in self.writers:
+                writer.serial_bus.close()
+            if GPIO is not None:
+                GPIO.cleanup()
 
 class ButtonManager:
     def __init__(self):
@@ -53,6 +108,10 @@ class ButtonManager:
             'right': [],
         }
         
+        # off the Pi the display still works, but there are no buttons to read
+        if GPIO is None:
+            raise ImportError("RPi.GPIO is not available")
+        
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(HC.PIN_BUTTON_YELLOW, GPIO.IN, pull_up_down=GPIO.PUD_UP)
         GPIO.setup(HC.PIN_BUTTON_RED, GPIO.IN, pull_up_down=GPIO.PUD_UP)
@@ -84,7 +143,10 @@ class Slider:
     def __init__(self):
         self.value = 0
         try:
-            ads = ADS.ADS1015(i2c)
+            import adafruit_ads1x15.ads1015 as ADS
+            from adafruit_ads1x15.analog_in import AnalogIn
+            
+            ads = ADS.ADS1015(get_i2c())
             self.analog_in = AnalogIn(ads, HC.ADS_CHANNEL_SLIDER)
         except Exception as e:
             print(f"Error initializing slider: {e}")
@@ -104,7 +166,9 @@ class DistanceSensor:
         self.value = 0
         self.sensor = None
         try:
-            self.sensor = adafruit_vl6180x.VL6180X(i2c)
+            import adafruit_vl6180x
+            
+            self.sensor = adafruit_vl6180x.VL6180X(get_i2c())
             self.sensor.range_rate_limit = 1
             try:
                 self.value = self.sensor.range * 10  # mm (VL6180X returns in mm already, but keeping *10 for consistency)
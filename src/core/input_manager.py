@@ -1,3 +1,4 @@
+import asyncio
 import time
 import threading
 
@@ -21,8 +22,13 @@ class InputManager:
         self.slider_value = 50
         self.last_gesture_time = 0
         self.gesture_cooldown = 1.0
+        self.poll_interval = 0.1
+        
+        # when set, callbacks are handed to this instead of being run on the calling thread
+        # (e.g. loop.call_soon_threadsafe to run them on an asyncio loop)
+        self.dispatch = None
     
-    def initialize_hardware(self):
+    def initialize_hardware(self, poll_threads=True):
         if self.use_simulator:
             return
         
@@ -33,17 +39,19 @@ class InputManager:
             self.button_manager.register_callback('left', lambda: self._handle_event(InputEvent.PRIMARY))
             self.button_manager.register_callback('right', lambda: self._handle_event(InputEvent.SECONDARY))
             
-            # slider thread
             self.slider = Slider()
-            self.running = True
-            self.slider_thread = threading.Thread(target=self._poll_slider)
-            self.slider_thread.daemon = True
-            self.slider_thread.start()
-        
             self.distance = DistanceSensor()
-            self.distance_thread = threading.Thread(target=self._poll_distance)
-            self.distance_thread.daemon = True
-            self.distance_thread.start()
+            self.running = True
+            
+            # without poll threads the owner runs poll_sensors_async() on its event loop
+            if poll_threads:
+                self.slider_thread = threading.Thread(target=self._poll_slider)
+                self.slider_thread.daemon = True
+                self.slider_thread.start()
+            
+                self.distance_thread = threading.Thread(target=self._poll_distance)
+                self.distance_thread.daemon = True
+                self.distance_thread.start()
             
         except ImportError as e:
             print(f"Error initializing hardware inputs: {e}")
@@ -89,7 +97,7 @@ class InputManager:
                     self._handle_slider_value_change(value)
                     last_value = value
             
-            time.sleep(0.1)
+            time.sleep(self.poll_interval)
 
     def _poll_distance(self):
         last_value = None
@@ -102,9 +110,36 @@ class InputManager:
                     self._handle_distance_value_change(value)
                     last_value = value
             
-            time.sleep(0.1)
+            time.sleep(self.poll_interval)
+    
+    async def poll_sensors_async(self, executor=None):
+        # polls both sensors from one task, the I2C reads run in the executor
+        loop = asyncio.get_running_loop()
+        last_slider = None
+        last_distance = None
+        
+        while self.running:
+            if hasattr(self, 'slider'):
+                value = await loop.run_in_executor(executor, self.slider.get_value)
+                if value != last_slider:
+                    self._handle_slider_value_change(value)
+                    last_slider = value
+            
+            if hasattr(self, 'distance'):
+                value = await loop.run_in_executor(executor, self.distance.get_value)
+                if value != last_distance:
+                    self._handle_distance_value_change(value)
+                    last_distance = value
+            
+            await asyncio.sleep(self.poll_interval)
     
     def _handle_event(self, event_type):
+        if self.dispatch is not None:
+            self.dispatch(self._run_event_callbacks, event_type)
+        else:
+            self._run_event_callbacks(event_type)
+    
+    def _run_event_callbacks(self, event_type):
         if event_type in self.callbacks:
             for callback in self.callbacks[event_type]:
                 callback()
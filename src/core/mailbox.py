@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import deque
+
+
+class Mailbox:
+    # bounded hand-off between threads; when full the oldest item is dropped, so a
+    # capacity of 1 gives latest-value-wins semantics
+    def __init__(self, capacity=1):
+        self.capacity = capacity
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        
+        self.submitted = 0
+        self.dropped = 0
+    
+    def put(self, item):
+        with self.condition:
+            if self.closed:
+                return False
+            
+            if len(self.items) >= self.capacity:
+                self.items.popleft()
+                self.dropped += 1
+            
+            self.items.append((item, time.monotonic()))
+            self.submitted += 1
+            self.condition.notify()
+            return True
+    
+    def get(self, timeout=None):
+        # returns (item, put_time), or (None, None) on timeout or once closed and empty
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None, None
+            return self.items.popleft()
+    
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+    
+    def __len__(self):
+        with self.condition:
+            return len(self.items)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from utils.constants import MetricsConstants as MC
+
+
+class StageTimer:
+    # fixed-size ring buffer of durations for one stage; recording is a clock read and an array
+    # store so it can sit in the frame path, percentiles are only computed when asked for
+    def __init__(self, name, history=MC.HISTORY):
+        self.name = name
+        self.history = history
+        self.samples = np.zeros(history, dtype=np.float64)
+        self.count = 0
+        self.max_duration = 0.0
+    
+    def record(self, duration):
+        self.samples[self.count % self.history] = duration
+        self.count += 1
+        if duration > self.max_duration:
+            self.max_duration = duration
+    
+    def reset(self):
+        self.count = 0
+        self.max_duration = 0.0
+    
+    def summary(self):
+        count = min(self.count, self.history)
+        if count == 0:
+            return {"count": 0}
+        
+        p50, p95, p99 = np.percentile(self.samples[:count], (50, 95, 99))
+        return {
+            "count": self.count,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+            "max_ms": round(self.max_duration * 1000, 3),
+        }
+
+
+class Metrics:
+    # registry of stage timers plus callables whose stats are reported alongside them. Stages
+    # may be recorded from any thread; a sample lost to a concurrent write only thins the
+    # window, it never corrupts a summary
+    def __init__(self, history=MC.HISTORY):
+        self.history = history
+        self.stages = {}
+        self.sources = {}
+    
+    def stage(self, name):
+        timer = self.stages.get(name)
+        if timer is None:
+            timer = self.stages.setdefault(name, StageTimer(name, self.history))
+        return timer
+    
+    def record(self, name, duration):
+        self.stage(name).record(duration)
+    
+    def register_source(self, name, get_stats):
+        self.sources[name] = get_stats
+    
+    def unregister_source(self, name):
+        self.sources.pop(name, None)
+    
+    def reset(self):
+        for timer in list(self.stages.values()):
+            timer.reset()
+    
+    def summary(self):
+        summary = {"stages": {name: timer.summary() for name, timer in list(self.stages.items())}}
+        for name, get_stats in list(self.sources.items()):
+            try:
+                summary[name] = get_stats()
+            except Exception as e:
+                summary[name] = {"error": str(e)}
+        return summary
+
+
+# process-wide registry, stages across modules report into the same summary
+metrics = Metrics()
@@ -1,10 +1,14 @@
+import asyncio
 import json
 import time
 import traceback
 import paho.mqtt.client as mqtt
 import os
 from dotenv import load_dotenv
-from threading import Timer
+from threading import Event, Thread
+
+from core.metrics import metrics
+from utils.constants import MetricsConstants as MC
 
 load_dotenv()
 
@@ -18,27 +22,77 @@ MQTT_PATTERN_TOPIC = "flip/pattern"
 MQTT_DRAW_TOPIC = "flip/draw"
 MQTT_CAMERA_TOPIC = "flip/camera"
 MQTT_STATUS_TOPIC = "flip/manager/status"
+MQTT_METRICS_TOPIC = "flip/manager/metrics"
+MQTT_PROFILE_TOPIC = "flip/manager/profile"
 MQTT_LOCK_REQUEST_TOPIC = "flip/lock/request"
 MQTT_LOCK_RESPONSE_TOPIC = "flip/lock/response"
 
 # 5 minute lockout
 LOCK_TIMEOUT_MS = 5 * 60 * 1000
 
+STATUS_INTERVAL = 1.0
+RECONNECT_INTERVAL = 5.0
+DISCONNECT_TIMEOUT = 1.0
+
+
+class AsyncioHelper:
+    # drives paho's network I/O from an asyncio loop instead of its own thread: the socket is
+    # watched with add_reader/add_writer and loop_misc runs as a task for keepalives
+    def __init__(self, loop, client):
+        self.loop = loop
+        self.client = client
+        self.misc = None
+        self.closed = asyncio.Event()
+        self.client.on_socket_open = self.on_socket_open
+        self.client.on_socket_close = self.on_socket_close
+        self.client.on_socket_register_write = self.on_socket_register_write
+        self.client.on_socket_unregister_write = self.on_socket_unregister_write
+    
+    def on_socket_open(self, client, userdata, sock):
+        self.closed.clear()
+        self.loop.add_reader(sock, client.loop_read)
+        self.misc = self.loop.create_task(self.misc_loop())
+    
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self.misc is not None:
+            self.misc.cancel()
+            self.misc = None
+        self.closed.set()
+    
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, client.loop_write)
+    
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+    
+    async def misc_loop(self):
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1.0)
+
 class MQTTManager:
-    def __init__(self, page_manager):
+    def __init__(self, page_manager, profiler=None):
         self.page_manager = page_manager
+        self.profiler = profiler
         self.broker_address = mqtt_broker_address
         self.broker_port = mqtt_broker_port
         self.username = mqtt_username
         self.password = mqtt_password
         self.client = None
         self._status_task = None
+        self._status_stop = Event()
+        self._last_metrics_time = time.monotonic()
+        self._asyncio_helper = None
+        self._cleaned_up = False
         
         self.client_locked = False
         self.authorized_client_id = ""
         self.lock_timestamp = 0
         
-    def initialize(self):
+    def initialize(self, loop=None):
+        """Connect to the broker. With an asyncio loop the network I/O and status publishing run
+        as tasks on it, call this from the loop's thread; otherwise paho and the status
+        publisher each get a thread."""
         if mqtt is None:
             print("MQTT client not available")
             return False
@@ -63,20 +117,44 @@ class MQTTManager:
         self.client.on_message = self._on_message
         
         try:
-            self.client.connect(self.broker_address, self.broker_port, 60)
-            self.client.loop_start()
-            
-            self._schedule_status_update()
+            if loop is None:
+                self.client.connect(self.broker_address, self.broker_port, 60)
+                self.client.loop_start()
+                
+                self._status_task = Thread(target=self._status_loop, name="mqtt-status")
+                self._status_task.daemon = True
+                self._status_task.start()
+            else:
+                self._asyncio_helper = AsyncioHelper(loop, self.client)
+                self.client.connect(self.broker_address, self.broker_port, 60)
+                
+                self._status_task = loop.create_task(self._status_loop_async())
             return True
         except Exception as e:
             print(f"Error connecting to MQTT broker: {e}")
             traceback.print_exc()
             return False
 
-    def _schedule_status_update(self):
-        self._publish_status()
-        # Schedule next update
-        Timer(1.0, self._schedule_status_update).start()
+    def _status_loop(self):
+        while not self._status_stop.is_set():
+            self._publish_status()
+            self._publish_metrics()
+            self._status_stop.wait(STATUS_INTERVAL)
+    
+    async def _status_loop_async(self):
+        # publishes status and, without paho's own thread, reconnects after the socket drops
+        while True:
+            if self.client.socket() is None:
+                try:
+                    self.client.reconnect()
+                except Exception as e:
+                    print(f"Error reconnecting to MQTT broker: {e}")
+                    await asyncio.sleep(RECONNECT_INTERVAL)
+                    continue
+            
+            self._publish_status()
+            self._publish_metrics()
+            await asyncio.sleep(STATUS_INTERVAL)
 
     def _publish_status(self):
         try:
@@ -96,6 +174,21 @@ class MQTTManager:
         except Exception as e:
             print(f"Error publishing status: {e}")
     
+    def _publish_metrics(self):
+        # stage timing percentiles and runtime stats, at a lower rate than the status heartbeat
+        now = time.monotonic()
+        if now - self._last_metrics_time < MC.PUBLISH_INTERVAL:
+            return
+        self._last_metrics_time = now
+        
+        try:
+            payload = metrics.summary()
+            payload["timestamp"] = time.time()
+            payload["current_page"] = self.page_manager.current_page_id
+            self.client.publish(MQTT_METRICS_TOPIC, json.dumps(payload, default=float))
+        except Exception as e:
+            print(f"Error publishing metrics: {e}")
+    
     def _on_connect(self, client, userdata, flags, rc):
         if rc == 0:
             # Subscribe to topics
@@ -103,6 +196,7 @@ class MQTTManager:
             client.subscribe(MQTT_DRAW_TOPIC)
             client.subscribe(MQTT_CAMERA_TOPIC)
             client.subscribe(MQTT_LOCK_REQUEST_TOPIC)
+            client.subscribe(MQTT_PROFILE_TOPIC)
             print("Subscribed to flip/* topics")
         else:
             print(f"Failed to connect to MQTT broker with code {rc}")
@@ -120,6 +214,11 @@ class MQTTManager:
                 self._handle_draw_message(payload)
             elif topic == MQTT_CAMERA_TOPIC:
                 self._handle_camera_message(payload)
+            elif topic == MQTT_PROFILE_TOPIC:
+                self._handle_profile_message(payload)
+            
+            # let an idle frame loop pick up page changes right away
+            self.page_manager.wake()
         except Exception as e:
             print(f"Error processing MQTT message: {e}")
             traceback.print_exc()
@@ -165,6 +264,10 @@ class MQTTManager:
             print(f"Pattern command rejected: Unauthorized client {client_id}")
             return
         
+        # applied by the frame loop; a newer pattern message replaces one it has not reached yet
+        self.page_manager.post(self._apply_pattern_message, data, key="mqtt.pattern")
+    
+    def _apply_pattern_message(self, data):
         if 'id' in data and data['enable']:
             pattern_type = data['id']
             pattern_speed = data.get('speed', 2.0)  # Default to 2.0
@@ -198,7 +301,11 @@ class MQTTManager:
         if not self._is_client_authorized(client_id):
             print(f"Draw command rejected: Unauthorized client {client_id}")
             return
-            
+        
+        # each message carries the whole drawing, so only the latest one needs applying
+        self.page_manager.post(self._apply_draw_message, data, key="mqtt.draw")
+    
+    def _apply_draw_message(self, data):
         if self.page_manager.current_page_id != "sketchpad":
             page_ids = self.page_manager.get_page_ids()
             if "sketchpad" in page_ids:
@@ -210,12 +317,45 @@ class MQTTManager:
         else:
             self.page_manager.current_page.set_drawing(data)
 
+    def _handle_profile_message(self, payload):
+        data = json.loads(payload)
+        
+        client_id = data.get('clientId')
+        if not self._is_client_authorized(client_id):
+            print(f"Profile command rejected: Unauthorized client {client_id}")
+            return
+        
+        if self.profiler is None:
+            print("Profiling not available")
+            return
+        
+        self.profiler.start(duration=data.get('duration'), mode=data.get('mode'))
+    
     def cleanup(self):
-        if self._status_task:
+        if self._cleaned_up:
+            return
+        self._cleaned_up = True
+        
+        self._status_stop.set()
+        if isinstance(self._status_task, asyncio.Task):
             self._status_task.cancel()
         if self.client:
-            self.client.loop_stop()
+            if self._asyncio_helper is None:
+                self.client.loop_stop()
             self.client.disconnect()
+    
+    async def cleanup_async(self, timeout=DISCONNECT_TIMEOUT):
+        """Disconnect from the loop's thread and wait until the loop has written the DISCONNECT
+        packet, paho closes the socket once it is out. Call before the loop exits."""
+        socket_open = self.client is not None and self.client.socket() is not None
+        self.cleanup()
+        if self._asyncio_helper is None or not socket_open:
+            return
+        
+        try:
+            await asyncio.wait_for(self._asyncio_helper.closed.wait(), timeout)
+        except asyncio.TimeoutError:
+            print("Timed out disconnecting from MQTT broker")
             
     # Client lock implementation methods
     def _request_client_lock(self, client_id):
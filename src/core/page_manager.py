@@ -1,16 +1,56 @@
 import importlib
+import threading
+import time
 import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core.command_bus import CommandBus
+from core.metrics import metrics
+from utils.constants import PageConstants as PGC
 
 class PageManager:
     def __init__(self, display_adapter):
         self.enabled = True
         self.display_adapter = display_adapter
-        self.pages = {}  # page_id -> page_class dict
+        self.pages = {}  # page_id -> page class, or "module:Class" until first shown
         self.page_metadata = {}  # page_id -> metadata dict
         self.current_page_id = None
         self.current_page = None
         self.page_history = []
         self.max_history = 10
+        
+        # pages switched away from are kept suspended, least recently used first, so switching
+        # back resumes them with their state instead of building and initializing them again
+        self.page_cache = OrderedDict()  # page_id -> suspended page
+        self.cache_size = PGC.CACHE_SIZE
+        self.cache_max_bytes = PGC.CACHE_MAX_BYTES
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        
+        # while the frame loop idles, the page a switch most likely goes to next is built ahead
+        # on a background thread and put in the cache suspended, so the switch only resumes it
+        self.prewarm_enabled = PGC.PREWARM
+        self.prewarm_future = None
+        self.prewarm_page_id = None
+        self.prewarmed = set()  # page ids in the cache that were built ahead and not shown yet
+        self.prewarm_skipped = set()  # failed or evicted before use, not built ahead again
+        self.prewarm_hits = 0
+        self.switch_requested = None  # perf_counter time of the last page switch request
+        
+        # set from input and MQTT threads so an idle frame loop renders immediately
+        self.wake_event = threading.Event()
+        self.on_wake = None  # extra hook, e.g. to set an asyncio.Event from any thread
+        # input, GPIO and MQTT threads post page changes here, the frame loop applies them
+        # in process_commands() so pages are never switched or changed mid-render
+        self.commands = CommandBus(on_post=self.wake)
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self.update_timer = metrics.stage("page.update")
+        self.render_timer = metrics.stage("page.render")
+        self.switch_timer = metrics.stage("page.switch")
+        self.switch_latency_timer = metrics.stage("page.switch_latency")
     
     def register_page(self, page_id, page_class, metadata=None):
         if page_id in self.pages:
@@ -50,6 +90,14 @@ class PageManager:
             traceback.print_exc()
             return False
     
+    def get_page_class(self, page_id):
+        page_class = self.pages[page_id]
+        if isinstance(page_class, str):
+            module_name, class_name = page_class.split(":")
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            self.pages[page_id] = page_class
+        return page_class
+    
     def get_page_ids(self):
         return list(self.pages.keys())
     
@@ -66,60 +114,54 @@ class PageManager:
             if len(self.page_history) > self.max_history:
                 self.page_history.pop(0)
         
-        page_class = self.pages[page_id]
-        
-        if self.current_page is not None:
-            try:
-                self.current_page.cleanup()
-            except Exception as e:
-                print(f"Error cleaning up page '{self.current_page_id}': {e}")
-        
-        try:
-            self.current_page = page_class(self.display_adapter)
-            self.current_page_id = page_id
-            self.current_page.initialize()
-            return True
-        except Exception as e:
-            print(f"Error initializing page '{page_id}': {e}")
-            traceback.print_exc()
-            self.current_page = None
-            self.current_page_id = None
-            return False
+        return self._show_page(page_id)
     
     def next_page(self):
-        page_ids = self.get_page_ids()
-        
-        if not page_ids:
-            return False
-        
-        # if no current page, navigate to the first page
-        if self.current_page_id is None:
-            return self.navigate_to(page_ids[0])
-        
-        try:
-            current_index = page_ids.index(self.current_page_id)
-        except ValueError:
-            current_index = -1
-        
-        next_index = (current_index + 1) % len(page_ids)
-        return self.navigate_to(page_ids[next_index])
+        return self.step_page(1)
     
     def previous_page(self):
+        return self.step_page(-1)
+    
+    def step_page(self, steps):
         page_ids = self.get_page_ids()
         
-        if not page_ids:
+        if not page_ids or steps == 0:
             return False
         
-        if self.current_page_id is None:
-            return self.navigate_to(page_ids[-1])
-        
+        # with no current page, the first step forward is the first page and back the last
         try:
             current_index = page_ids.index(self.current_page_id)
         except ValueError:
-            current_index = 0
+            current_index = -1 if steps > 0 else 0
         
-        prev_index = (current_index - 1) % len(page_ids)
-        return self.navigate_to(page_ids[prev_index])
+        return self.navigate_to(page_ids[(current_index + steps) % len(page_ids)])
+    
+    def post(self, work, *args, key=None, merge=None):
+        """Run work(*args) on the frame loop at its next process_commands(), safe from any thread.
+        See CommandBus for how key and merge coalesce commands."""
+        self.commands.post(work, *args, key=key, merge=merge)
+    
+    def post_next_page(self):
+        # rapid presses collapse into one switch that skips ahead by all of them
+        self.post(self.step_page, 1, key="page.step", merge=_add_steps)
+    
+    def post_previous_page(self):
+        self.post(self.step_page, -1, key="page.step", merge=_add_steps)
+    
+    def post_navigate(self, page_id):
+        self.post(self.navigate_to, page_id, key="page.navigate")
+    
+    def post_back(self):
+        self.post(self.back)
+    
+    def post_slider_change(self, value):
+        # only the latest value matters
+        self.post(self.handle_slider_change, value, key="page.slider")
+    
+    def process_commands(self):
+        """Apply the commands posted since the last call. Called by the frame loop at the start of
+        each frame, from the thread that updates and renders the pages."""
+        return self.commands.drain()
     
     def back(self):
         if not self.page_history:
@@ -129,33 +171,181 @@ class PageManager:
         previous_page_id = self.page_history.pop()
         
         if previous_page_id in self.pages:
-            page_class = self.pages[previous_page_id]
-            
-            # cleanup current page if it exists
-            if self.current_page is not None:
-                try:
-                    self.current_page.cleanup()
-                except Exception as e:
-                    print(f"Error cleaning up page '{self.current_page_id}': {e}")
+            return self._show_page(previous_page_id)
+        
+        return False
+    
+    def _show_page(self, page_id):
+        start = time.perf_counter()
+        self._suspend_current()
+        
+        # a page still being built ahead is finished rather than built a second time
+        self._collect_prewarmed(wait_for=page_id)
+        
+        page = self.page_cache.pop(page_id, None)
+        try:
+            if page is not None:
+                self.cache_hits += 1
+                if page_id in self.prewarmed:
+                    self.prewarmed.discard(page_id)
+                    self.prewarm_hits += 1
+                page.resume()
+            else:
+                self.cache_misses += 1
+                page_class = self.get_page_class(page_id)
+                page = page_class(self.display_adapter)
+                page.initialize()
             
-            # create the new page
+            self.current_page = page
+            self.current_page_id = page_id
+            # a switch posted from input counts from when it was posted
+            command = self.commands.current
+            self.switch_requested = command.posted_at if command is not None else start
+            self.switch_timer.record(time.perf_counter() - start)
+            self.wake()
+            return True
+        except Exception as e:
+            print(f"Error initializing page '{page_id}': {e}")
+            traceback.print_exc()
+            if page is not None:
+                self._cleanup_page(page_id, page)
+            return False
+    
+    def _suspend_current(self):
+        page, page_id = self.current_page, self.current_page_id
+        self.current_page = None
+        self.current_page_id = None
+        if page is None:
+            return
+        
+        if not page.cacheable or self.cache_size <= 0:
+            self._cleanup_page(page_id, page)
+            return
+        
+        try:
+            page.suspend()
+        except Exception as e:
+            print(f"Error suspending page '{page_id}': {e}")
+            self._cleanup_page(page_id, page)
+            return
+        
+        self.page_cache[page_id] = page
+        self._evict_pages()
+    
+    def _evict_pages(self):
+        # drop the least recently used pages until both the count and the size bound hold
+        while self.page_cache and (len(self.page_cache) > self.cache_size or self._cache_bytes() > self.cache_max_bytes):
+            page_id, page = self.page_cache.popitem(last=False)
+            self.cache_evictions += 1
+            if page_id in self.prewarmed:
+                self.prewarmed.discard(page_id)
+                self.prewarm_skipped.add(page_id)
+            self._cleanup_page(page_id, page)
+    
+    def _cache_bytes(self):
+        total = 0
+        for page_id, page in list(self.page_cache.items()):
             try:
-                self.current_page = page_class(self.display_adapter)
-                self.current_page_id = previous_page_id
-                self.current_page.initialize()
-                return True
+                total += page.memory_usage()
             except Exception as e:
-                print(f"Error initializing page '{previous_page_id}': {e}")
-                self.current_page = None
-                self.current_page_id = None
-                return False
+                print(f"Error getting memory usage of page '{page_id}': {e}")
+        return total
+    
+    def _cleanup_page(self, page_id, page):
+        try:
+            page.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up page '{page_id}': {e}")
+    
+    def clear_cache(self):
+        while self.page_cache:
+            page_id, page = self.page_cache.popitem(last=False)
+            self._cleanup_page(page_id, page)
+        self.prewarmed.clear()
+    
+    def predict_next_page(self):
+        """Page id most likely to be shown next, None when there is none."""
+        page_ids = self.get_page_ids()
+        if not page_ids:
+            return None
         
-        return False
+        # the primary button cycles pages in registration order
+        if self.current_page_id in page_ids:
+            return page_ids[(page_ids.index(self.current_page_id) + 1) % len(page_ids)]
+        return page_ids[0]
+    
+    def prewarm(self, idle=False):
+        """Let the current page build ahead what it needs next and, when idle, start building the
+        likely next page. Called from the frame loop once a frame is done, with idle when it is
+        about to sleep; cheap when there is nothing to do."""
+        if not self.prewarm_enabled:
+            return
+        
+        self._collect_prewarmed()
+        page_id = self.predict_next_page() if idle and self.prewarm_future is None else None
+        if (page_id is not None and page_id != self.current_page_id and len(self.page_cache) < self.cache_size
+                and page_id not in self.page_cache and page_id not in self.prewarm_skipped):
+            self.prewarm_page_id = page_id
+            self.prewarm_future = self.submit(self._build_page, page_id)
+        
+        if self.current_page is not None:
+            try:
+                self.current_page.prewarm(self.submit)
+            except Exception as e:
+                print(f"Error prewarming on page '{self.current_page_id}': {e}")
+    
+    def submit(self, work, *args):
+        # runs work on its own daemon thread, so a page stuck in initialize() never holds up exit
+        future = Future()
+        
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(work(*args))
+            except Exception as e:
+                future.set_exception(e)
+        
+        thread = threading.Thread(target=run, name="prewarm")
+        thread.daemon = True
+        thread.start()
+        return future
+    
+    def _build_page(self, page_id):
+        start = time.perf_counter()
+        page = self.get_page_class(page_id)(self.display_adapter)
+        page.initialize()
+        page.suspend()
+        print(f"Prewarmed page '{page_id}' in {time.perf_counter() - start:.3f}s")
+        return page
+    
+    def _collect_prewarmed(self, wait_for=None):
+        future, page_id = self.prewarm_future, self.prewarm_page_id
+        if future is None or not (future.done() or page_id == wait_for):
+            return
+        
+        self.prewarm_future = None
+        self.prewarm_page_id = None
+        try:
+            page = future.result()
+        except Exception as e:
+            print(f"Error prewarming page '{page_id}': {e}")
+            self.prewarm_skipped.add(page_id)
+            return
+        
+        if page_id == self.current_page_id or page_id in self.page_cache:
+            self._cleanup_page(page_id, page)
+            return
+        
+        self.page_cache[page_id] = page
+        self.prewarmed.add(page_id)
+        self._evict_pages()
     
     def handle_slider_change(self, value):
         if self.current_page is not None and hasattr(self.current_page, 'handle_slider_change'):
             try:
                 self.current_page.handle_slider_change(value)
+                self.wake()
                 return True
             except Exception as e:
                 print(f"Error handling slider change on page '{self.current_page_id}': {e}")
@@ -167,32 +357,97 @@ class PageManager:
             return False
 
         try:
+            start = time.perf_counter()
             if self.enabled:
                 self.current_page.update(camera_frame, face_landmarks, gestures)
-            else:
+            elif self.current_page.frame.any():
                 self.current_page.clear_frame()
-                self.current_page.render()
+            self.update_timer.record(time.perf_counter() - start)
             return True
         except Exception as e:
             print(f"Error updating page '{self.current_page_id}': {e}")
             traceback.print_exc()
             return False
     
+    def wake(self, *args):
+        self.wake_event.set()
+        if self.on_wake is not None:
+            self.on_wake()
+    
+    def needs_render(self):
+        if self.current_page is None:
+            return False
+        
+        if self.current_page.is_dirty():
+            return True
+        self.frames_skipped += 1
+        return False
+    
+    def time_until_update(self):
+        """Seconds until the current page changes on its own, None when only input can change it."""
+        if self.current_page is None or not self.enabled:
+            return None
+        
+        try:
+            next_update_time = self.current_page.next_update_time()
+        except Exception as e:
+            print(f"Error getting next update time for page '{self.current_page_id}': {e}")
+            return 0.0
+        
+        if next_update_time is None:
+            return None
+        return max(0.0, next_update_time - time.time())
+    
     def render(self):
         if self.current_page is None:
             return None
         
         try:
-            return self.current_page.render()
+            start = time.perf_counter()
+            frame = self.current_page.render()
+            self.render_timer.record(time.perf_counter() - start)
+            self.current_page.mark_clean()
+            self.frames_rendered += 1
+            
+            # from the switch request to the new page's first frame
+            if self.switch_requested is not None and frame is not None:
+                self.switch_latency_timer.record(time.perf_counter() - self.switch_requested)
+                self.switch_requested = None
+            return frame
         except Exception as e:
             print(f"Error rendering page '{self.current_page_id}': {e}")
             traceback.print_exc()
             return None
     
+    def get_stats(self):
+        return {
+            "frames_rendered": self.frames_rendered,
+            "frames_skipped": self.frames_skipped,
+            "cached_pages": list(self.page_cache.keys()),
+            "cache_bytes": self._cache_bytes(),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_evictions": self.cache_evictions,
+            "prewarmed_pages": sorted(self.prewarmed),
+            "prewarm_hits": self.prewarm_hits,
+        }
+    
     def cleanup(self):
         if self.current_page is not None:
-            try:
-                self.current_page.cleanup()
-            except Exception as e:
-                print(f"Error cleaning up page '{self.current_page_id}': {e}")
-    
\ No newline at end of file
+            self._cleanup_page(self.current_page_id, self.current_page)
+        
+        # a page still being built ahead is cleaned up once it is done, without waiting for it
+        if self.prewarm_future is not None:
+            page_id = self.prewarm_page_id
+            
+            def cleanup_prewarmed(future):
+                if future.exception() is None:
+                    self._cleanup_page(page_id, future.result())
+            
+            self.prewarm_future.add_done_callback(cleanup_prewarmed)
+            self.prewarm_future = None
+        self.clear_cache()
+
+
+def _add_steps(old_args, new_args):
+    return (old_args[0] + new_args[0],)
@@ -0,0 +1,138 @@
+import threading
+import time
+import traceback
+
+from core.mailbox import Mailbox
+
+
+class PipelineStage:
+    # one worker thread that takes the latest item from its inbox, runs work on it and puts the
+    # result in its outbox. A stage without an inbox is a source and calls work(None) in a loop,
+    # so work has to block or pace itself. With an input_timeout the stage also calls work(None)
+    # when nothing arrives in time, which lets a stage run on its own clock and take fresh input
+    # when there is some; pace is called before each item and is not counted as busy time.
+    # Returning None from work forwards nothing.
+    def __init__(self, name, work, inbox=None, outbox=None, input_timeout=None, pace=None):
+        self.name = name
+        self.work = work
+        self.pace = pace
+        self.inbox = inbox
+        self.outbox = outbox
+        self.input_timeout = input_timeout
+        self.thread = None
+        self.running = False
+        
+        self.items = 0
+        self.errors = 0
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.window_start = time.monotonic()
+        self.busy_time = 0.0
+        self.window_items = 0
+        self.last_age = 0.0
+        self.max_age = 0.0
+        self.total_age = 0.0
+        self.aged_items = 0
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self, timeout=1.0):
+        self.running = False
+        if self.inbox is not None:
+            self.inbox.close()
+        if self.thread is not None and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+    
+    def _run(self):
+        while self.running:
+            if self.pace is not None:
+                self.pace()
+            
+            item = None
+            if self.inbox is not None:
+                item, put_time = self.inbox.get(self.input_timeout)
+                if item is None:
+                    if self.inbox.closed or self.input_timeout is None:
+                        break
+                else:
+                    self._record_age(time.monotonic() - put_time)
+            
+            start = time.monotonic()
+            try:
+                result = self.work(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in pipeline stage '{self.name}': {e}")
+                traceback.print_exc()
+                result = None
+            self.busy_time += time.monotonic() - start
+            self.items += 1
+            self.window_items += 1
+            
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+    
+    def _record_age(self, age):
+        self.last_age = age
+        self.max_age = max(self.max_age, age)
+        self.total_age += age
+        self.aged_items += 1
+    
+    def get_stats(self):
+        elapsed = max(time.monotonic() - self.window_start, 1e-9)
+        stats = {
+            "items": self.items,
+            "errors": self.errors,
+            "rate": round(self.window_items / elapsed, 2),
+            "utilization": round(min(1.0, self.busy_time / elapsed), 3),
+        }
+        if self.inbox is not None:
+            stats["queue_depth"] = len(self.inbox)
+            stats["queue_dropped"] = self.inbox.dropped
+            stats["queue_age_ms_last"] = round(self.last_age * 1000, 2)
+            stats["queue_age_ms_max"] = round(self.max_age * 1000, 2)
+            stats["queue_age_ms_mean"] = round(self.total_age / self.aged_items * 1000, 2) if self.aged_items else 0.0
+        return stats
+
+
+class Pipeline:
+    # chains stages with latest-value mailboxes so throughput is set by the slowest stage rather
+    # than the sum of all of them
+    def __init__(self, queue_size=1):
+        self.queue_size = queue_size
+        self.stages = []
+    
+    def add_stage(self, name, work, source=False, input_timeout=None, pace=None):
+        inbox = None
+        if not source:
+            if not self.stages:
+                raise ValueError(f"Stage '{name}' needs an upstream stage or must be a source")
+            upstream = self.stages[-1]
+            if upstream.outbox is None:
+                upstream.outbox = Mailbox(capacity=self.queue_size)
+            inbox = upstream.outbox
+        
+        stage = PipelineStage(name, work, inbox=inbox, input_timeout=input_timeout, pace=pace)
+        self.stages.append(stage)
+        return stage
+    
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+    
+    def stop(self, timeout=1.0):
+        # stop upstream first so downstream stages drain and exit once their inbox closes
+        for stage in self.stages:
+            stage.stop(timeout)
+    
+    def reset_stats(self):
+        for stage in self.stages:
+            stage.reset_stats()
+    
+    def get_stats(self):
+        return {stage.name: stage.get_stats() for stage in self.stages}
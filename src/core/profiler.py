@@ -0,0 +1,190 @@
+import cProfile
+import json
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+from utils.constants import ProfileConstants as PC
+
+PROFILE_MODES = ("sample", "cprofile")
+
+
+class Profiler:
+    # profiles the running process for a fixed time and then switches itself off.
+    # "sample" polls the stacks of every thread from a background thread, cheap enough to leave
+    # the display running normally, and writes folded stacks for flame graph tools. "cprofile"
+    # traces the frame loop thread only: it is enabled and disabled from tick(), which the frame
+    # loop calls once per frame. Each run also writes a JSON file with the page and pattern that
+    # were showing
+    def __init__(self, output_dir=PC.OUTPUT_DIR, context=None):
+        self.output_dir = output_dir
+        self.context = context
+        self.lock = threading.RLock()  # start() may run in a signal handler on a thread holding it
+        
+        self.mode = None  # set while a run is active
+        self.duration = 0.0
+        self.deadline = 0.0
+        self.start_time = 0.0
+        self.start_context = None
+        self.cprofile = None
+        self.sampler_thread = None
+        self.runs = 0
+    
+    @property
+    def active(self):
+        return self.mode is not None
+    
+    def start(self, duration=None, mode=None):
+        duration = min(float(duration or PC.DURATION), PC.MAX_DURATION)
+        mode = mode or PC.MODE
+        if mode not in PROFILE_MODES:
+            print(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+            return False
+        
+        with self.lock:
+            if self.mode is not None:
+                print(f"Profiler already running ({self.mode})")
+                return False
+            self.mode = mode
+            self.duration = duration
+            self.start_time = time.time()
+            self.deadline = time.monotonic() + duration
+            self.start_context = self._get_context()
+        
+        print(f"Profiling ({mode}) for {duration:.1f}s")
+        if mode == "sample":
+            self.sampler_thread = threading.Thread(target=self._sample, name="profiler")
+            self.sampler_thread.daemon = True
+            self.sampler_thread.start()
+        return True
+    
+    def tick(self):
+        # called from the frame loop; a plain attribute check when no cProfile run is pending
+        if self.mode != "cprofile":
+            return
+        
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        elif time.monotonic() >= self.deadline:
+            self.cprofile.disable()
+            profile, self.cprofile = self.cprofile, None
+            self._finish_cprofile(profile)
+    
+    def install_signal_handlers(self):
+        """SIGUSR1 starts a sampling run, SIGUSR2 a cProfile run of the frame loop, both with
+        the default duration. Must be called from the main thread."""
+        if not hasattr(signal, "SIGUSR1"):
+            print("Profiling signals not available on this platform")
+            return False
+        
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.start(mode="sample"))
+        signal.signal(signal.SIGUSR2, lambda signum, frame: self.start(mode="cprofile"))
+        return True
+    
+    def _get_context(self):
+        if self.context is None:
+            return {}
+        try:
+            return self.context()
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def _sample(self):
+        own_ident = threading.get_ident()
+        labels = {}  # code object -> "function (file:line)"
+        stacks = Counter()
+        samples = 0
+        
+        while time.monotonic() < self.deadline:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                        labels[code] = label
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, str(ident)))
+                stacks[";".join(reversed(stack))] += 1
+            
+            samples += 1
+            time.sleep(PC.SAMPLE_INTERVAL)
+        
+        try:
+            self._finish_sample(stacks, samples)
+        finally:
+            self._reset()
+    
+    def _finish_sample(self, stacks, samples):
+        path = self._output_path("folded")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        
+        # functions on top of the stack, i.e. where the time is spent rather than waited in
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        top = [{"function": function, "samples": count} for function, count in leaves.most_common(PC.TOP_FUNCTIONS)]
+        
+        self._write_metadata(path, samples=samples, top_functions=top)
+        print(f"Profile written to {path} ({samples} samples)")
+        for entry in top[:10]:
+            print(f"  {entry['samples']:6d}  {entry['function']}")
+    
+    def _finish_cprofile(self, profile):
+        try:
+            path = self._output_path("prof")
+            profile.dump_stats(path)
+            
+            stats = pstats.Stats(profile)
+            top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PC.TOP_FUNCTIONS]
+            top_functions = [{
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "total_s": round(total_time, 4),
+                "cumulative_s": round(cumulative_time, 4),
+            } for (filename, line, name), (_, calls, total_time, cumulative_time, _) in top]
+            
+            self._write_metadata(path, top_functions=top_functions)
+            print(f"Profile written to {path}")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+        finally:
+            self._reset()
+    
+    def _output_path(self, extension):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.start_time))
+        page = self.start_context.get("page") or "none"
+        return os.path.join(self.output_dir, f"profile-{stamp}-{page}.{extension}")
+    
+    def _write_metadata(self, path, **extra):
+        metadata = {
+            "mode": self.mode,
+            "duration": self.duration,
+            "started": self.start_time,
+            "context_start": self.start_context,
+            "context_end": self._get_context(),
+            "profile": os.path.basename(path),
+        }
+        metadata.update(extra)
+        with open(os.path.splitext(path)[0] + ".json", "w") as f:
+            json.dump(metadata, f, indent=2, default=str)
+    
+    def _reset(self):
+        with self.lock:
+            self.mode = None
+            self.sampler_thread = None
+            self.runs += 1
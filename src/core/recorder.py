@@ -0,0 +1,212 @@
+# headless display adapter that appends every frame to a compact binary log, plus a memory-mapped reader
+#
+# file layout: 16 byte header (magic, width, height as little endian uint16, 4 reserved bytes)
+# followed by fixed-size records of a float64 timestamp and the bit-packed frame. Timestamps are
+# monotonic seconds, offset per recording session so they keep increasing across sessions
+# appended to the same log
+import mmap
+import os
+import struct
+import time
+import numpy as np
+
+from core.display import Display
+from utils.constants import RecordConstants as RC
+
+LOG_MAGIC = b"FLIPLOG1"
+HEADER_FORMAT = "<8sHH4x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TIMESTAMP_FORMAT = "<d"
+
+
+def record_dtype(width, height):
+    return np.dtype([("timestamp", "<f8"), ("frame", np.uint8, ((width * height + 7) // 8,))])
+
+
+class RecordingDisplay(Display):
+    def __init__(self, path, width=None, height=None, max_bytes=RC.LOG_MAX_BYTES,
+                 backup_count=RC.LOG_BACKUP_COUNT, topology=None):
+        if topology is not None:
+            super().__init__(topology.width, topology.height)
+        elif width is not None and height is not None:
+            super().__init__(width, height)
+        else:
+            super().__init__()
+        
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.record_size = record_dtype(self.width, self.height).itemsize
+        self.file = None
+        self.last_flush_time = 0
+        self.time_offset = 0.0  # added to time.monotonic(), which restarts with every boot
+        
+        self.frames_recorded = 0
+        self.bytes_recorded = 0
+        self.rotations = 0
+    
+    def initialize(self):
+        self._open()
+        return True
+    
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.file = open(self.path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(struct.pack(HEADER_FORMAT, LOG_MAGIC, self.width, self.height))
+        elif not self._header_matches():
+            # never append records of a different size to an existing log
+            self.file.close()
+            self._rotate_files()
+            self.file = open(self.path, 'ab')
+            self.file.write(struct.pack(HEADER_FORMAT, LOG_MAGIC, self.width, self.height))
+        
+        else:
+            # drop a record cut short by a crash, appending after it would misalign every record
+            partial = (self.file.tell() - HEADER_SIZE) % self.record_size
+            if partial:
+                self.file.truncate(self.file.tell() - partial)
+        
+        # a session appended after a reboot would otherwise start before the previous one ended
+        last_timestamp = self._last_timestamp()
+        if last_timestamp is not None:
+            self.time_offset = max(self.time_offset, last_timestamp - time.monotonic())
+        self.last_flush_time = time.monotonic()
+    
+    def _last_timestamp(self):
+        self.file.flush()
+        count = (self.file.tell() - HEADER_SIZE) // self.record_size
+        if count <= 0:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(HEADER_SIZE + (count - 1) * self.record_size)
+            return struct.unpack(TIMESTAMP_FORMAT, f.read(struct.calcsize(TIMESTAMP_FORMAT)))[0]
+    
+    def _header_matches(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        return len(header) == HEADER_SIZE and struct.unpack(HEADER_FORMAT, header) == (LOG_MAGIC, self.width, self.height)
+    
+    def send_frame(self, frame_matrix, atomic=None):
+        if self.file is None:
+            return
+        
+        packed = np.packbits(np.asarray(frame_matrix) != 0)
+        self.file.write(struct.pack(TIMESTAMP_FORMAT, time.monotonic() + self.time_offset))
+        self.file.write(packed.tobytes())
+        self.frames_recorded += 1
+        self.bytes_recorded += self.record_size
+        
+        # buffered writes keep SD card wear and syscalls down, flush at most every FLUSH_INTERVAL
+        now = time.monotonic()
+        if now - self.last_flush_time >= RC.FLUSH_INTERVAL:
+            self.file.flush()
+            self.last_flush_time = now
+        
+        if self.max_bytes > 0 and self.file.tell() + self.record_size > self.max_bytes:
+            self.rotate()
+    
+    def rotate(self):
+        self.file.close()
+        self._rotate_files()
+        self.rotations += 1
+        self._open()
+    
+    def _rotate_files(self):
+        # path -> path.1 -> path.2 ..., the oldest beyond backup_count is deleted
+        for index in range(self.backup_count, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backup_count == 0 and os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def get_stats(self):
+        return {
+            "frames_recorded": self.frames_recorded,
+            "bytes_recorded": self.bytes_recorded,
+            "rotations": self.rotations,
+        }
+    
+    def cleanup(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class FrameLogReader:
+    # records is a zero-copy view of the memory-mapped log. timestamps is a small copy, so it
+    # stays usable after close(); a records view still held by a caller keeps the mapping open
+    # until it is dropped
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = None
+        
+        size = os.fstat(self.file.fileno()).st_size
+        if size < HEADER_SIZE:
+            # a recording interrupted right at start may not have its header yet, it has no frames
+            if not LOG_MAGIC.startswith(self.file.read(len(LOG_MAGIC))):
+                raise ValueError(f"{path} is not a frame log")
+            self.width, self.height = 0, 0
+            self.records = np.zeros(0, dtype=record_dtype(0, 0))
+        else:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.width, self.height = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+            if magic != LOG_MAGIC:
+                raise ValueError(f"{path} is not a frame log")
+            
+            dtype = record_dtype(self.width, self.height)
+            # a record cut short by a crash or power loss is ignored, a header-only log has none
+            count = (len(self.map) - HEADER_SIZE) // dtype.itemsize
+            self.records = np.frombuffer(self.map, dtype=dtype, count=count, offset=HEADER_SIZE)
+        self.timestamps = np.array(self.records["timestamp"])
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def __getitem__(self, index):
+        record = self.records[index]
+        return float(record["timestamp"]), self._unpack(record["frame"][None])[0]
+    
+    def frames(self, start=0, stop=None):
+        # bulk unpack of a range of records into an (n, height, width) array
+        return self._unpack(self.records["frame"][start:stop])
+    
+    def _unpack(self, packed):
+        bits = np.unpackbits(packed, axis=1, count=self.width * self.height)
+        return bits.reshape(len(packed), self.height, self.width)
+    
+    def replay(self, display, speed=1.0, start=0, stop=None):
+        # sends the recorded frames to a display, speed <= 0 replays as fast as possible
+        stop = len(self) if stop is None else stop
+        if start >= stop:
+            return
+        
+        replay_start = time.monotonic()
+        first_timestamp = self.timestamps[start]
+        for index in range(start, stop):
+            if index > start and self.timestamps[index] < self.timestamps[index - 1]:
+                # logs written before session offsets restart at every boot, continue from here
+                replay_start = time.monotonic()
+                first_timestamp = self.timestamps[index]
+            if speed > 0:
+                due = replay_start + (self.timestamps[index] - first_timestamp) / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            display.send_frame(self[index][1])
+    
+    def close(self):
+        self.records = None
+        self.timestamps = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass  # unmapped once the caller's views are garbage collected
+            self.map = None
+        self.file.close()
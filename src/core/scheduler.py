@@ -0,0 +1,135 @@
+import asyncio
+import time
+import numpy as np
+from utils.constants import DisplayConstants as DC
+
+
+class FrameScheduler:
+    # paces the main loop against absolute deadlines on the monotonic clock. Each deadline is
+    # the previous one plus the period, so sleep overshoot and work time never accumulate into
+    # drift; when a frame overruns by more than a period the missed slots are skipped instead
+    # of bursting to catch up
+    def __init__(self, fps=DC.FRAME_RATE, history=DC.FRAME_STATS_HISTORY):
+        if not fps > 0:
+            raise ValueError(f"fps must be positive, got {fps}")
+        self.period = 1.0 / fps
+        self.next_deadline = None
+        self.frame_start = None
+        self.last_work_time = 0.0
+        
+        self.history = history
+        self.lateness = np.zeros(history, dtype=np.float64)
+        self.work_time = np.zeros(history, dtype=np.float64)
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.frames = 0
+        self.overruns = 0
+        self.skipped_frames = 0
+        self.idle_time = 0.0
+        self.idle_wakeups = 0
+        self.max_lateness = 0.0
+        self.max_work_time = 0.0
+    
+    def start(self):
+        self.next_deadline = time.monotonic() + self.period
+        self.frame_start = time.monotonic()
+    
+    def wait(self):
+        """Sleep until the next frame deadline, call once per frame after the frame's work."""
+        deadline, delay = self._begin_wait()
+        if delay > 0:
+            time.sleep(delay)
+        self._end_wait(deadline)
+    
+    async def wait_async(self):
+        deadline, delay = self._begin_wait()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._end_wait(deadline)
+    
+    def idle(self, timeout, wake_event):
+        """Block past the next frame until timeout seconds pass or wake_event is set, called
+        after wait() when nothing is due. Pacing restarts from the wake so it is not an overrun."""
+        start = time.monotonic()
+        woken = wake_event.wait(self._idle_timeout(timeout))
+        if woken:
+            wake_event.clear()
+        self._end_idle(start, woken)
+    
+    async def idle_async(self, timeout, wake_event):
+        # same as idle() with an asyncio.Event
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(wake_event.wait(), self._idle_timeout(timeout))
+            wake_event.clear()
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        self._end_idle(start, woken)
+    
+    def _begin_wait(self):
+        if self.next_deadline is None:
+            self.start()
+        
+        now = time.monotonic()
+        self.last_work_time = now - self.frame_start
+        
+        deadline = self.next_deadline
+        if now < deadline:
+            return deadline, deadline - now
+        
+        self.overruns += 1
+        missed = int((now - deadline) // self.period)
+        if missed > 0:
+            self.skipped_frames += missed
+            deadline += missed * self.period
+        return deadline, 0.0
+    
+    def _end_wait(self, deadline):
+        wake_time = time.monotonic()
+        lateness = max(0.0, wake_time - deadline)
+        self.next_deadline = deadline + self.period
+        self.frame_start = wake_time
+        
+        index = self.frames % self.history
+        self.lateness[index] = lateness
+        self.work_time[index] = self.last_work_time
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.max_work_time = max(self.max_work_time, self.last_work_time)
+        self.frames += 1
+    
+    def _idle_timeout(self, timeout):
+        if timeout is None or timeout > DC.MAX_IDLE_INTERVAL:
+            return DC.MAX_IDLE_INTERVAL
+        return timeout
+    
+    def _end_idle(self, start, woken):
+        now = time.monotonic()
+        if woken:
+            self.idle_wakeups += 1
+        self.idle_time += now - start
+        self.next_deadline = now + self.period
+        self.frame_start = now
+    
+    def get_stats(self):
+        count = min(self.frames, self.history)
+        stats = {
+            "target_fps": round(1.0 / self.period, 2),
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "skipped_frames": self.skipped_frames,
+            "max_jitter_ms": round(self.max_lateness * 1000, 2),
+            "max_work_ms": round(self.max_work_time * 1000, 2),
+            "idle_s": round(self.idle_time, 2),
+            "idle_wakeups": self.idle_wakeups,
+        }
+        if count > 0:
+            lateness = self.lateness[:count]
+            work_time = self.work_time[:count]
+            stats["jitter_ms_mean"] = round(float(lateness.mean()) * 1000, 3)
+            stats["jitter_ms_p95"] = round(float(np.percentile(lateness, 95)) * 1000, 3)
+            stats["work_ms_mean"] = round(float(work_time.mean()) * 1000, 3)
+            stats["work_ms_p95"] = round(float(np.percentile(work_time, 95)) * 1000, 3)
+            stats["budget_used_p95"] = round(float(np.percentile(work_time, 95)) / self.period, 3)
+        return stats
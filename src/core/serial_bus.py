@@ -0,0 +1,174 @@
+import threading
+import time
+import numpy as np
+import serial
+from core.mailbox import Mailbox
+from utils.constants import HardwareConstants as HC
+
+
+class TransmitStats:
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.start_time = time.monotonic()
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.frames_sent = 0
+        self.wire_time = 0.0
+    
+    def record(self, byte_count, packet_count, wire_time):
+        self.bytes_sent += byte_count
+        self.packets_sent += packet_count
+        self.frames_sent += 1
+        self.wire_time += wire_time
+    
+    def bytes_per_second(self):
+        elapsed = time.monotonic() - self.start_time
+        return self.bytes_sent / elapsed if elapsed > 0 else 0.0
+    
+    def frames_per_second(self):
+        elapsed = time.monotonic() - self.start_time
+        return self.frames_sent / elapsed if elapsed > 0 else 0.0
+    
+    def summary(self):
+        return {
+            "bytes_sent": self.bytes_sent,
+            "packets_sent": self.packets_sent,
+            "frames_sent": self.frames_sent,
+            "bytes_per_second": round(self.bytes_per_second(), 1),
+            "frames_per_second": round(self.frames_per_second(), 2),
+            "wire_time": round(self.wire_time, 3),
+        }
+
+
+class SerialBus:
+    # one RS485 port; every frame goes out as a single write and the next write waits
+    # until the previous one has left the wire plus the panel controllers' idle gap
+    def __init__(self, port_name=HC.SERIAL_PORT_NAME, baudrate=HC.SERIAL_BAUDRATE):
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.serial_port = None
+        self.byte_time = HC.SERIAL_BITS_PER_BYTE / baudrate
+        self.idle_time = 0.0  # monotonic time at which the bus is free again
+        self.stats = TransmitStats()
+    
+    def open(self):
+        self.serial_port = serial.Serial(
+            port=self.port_name,
+            baudrate=self.baudrate,
+            timeout=1,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            bytesize=serial.EIGHTBITS
+        )
+        self.idle_time = 0.0
+        self.stats.reset()
+    
+    def wire_time(self, byte_count):
+        return byte_count * self.byte_time
+    
+    def wait_until_idle(self):
+        delay = self.idle_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def write(self, data, packet_count=1):
+        self.wait_until_idle()
+        self.serial_port.write(data)
+        
+        wire_time = self.wire_time(len(data))
+        self.idle_time = time.monotonic() + wire_time + HC.SERIAL_PACKET_GAP
+        self.stats.record(len(data), packet_count, wire_time)
+    
+    def is_open(self):
+        return self.serial_port is not None and self.serial_port.is_open
+    
+    def close(self):
+        if self.is_open():
+            self.wait_until_idle()
+            self.serial_port.close()
+
+
+class SerialWriter:
+    # owns the transmit side of one bus on a dedicated thread; frames are handed over
+    # through a single-slot mailbox so a newer frame replaces one that was not sent yet
+    def __init__(self, serial_bus, frame_builder, panel_diff, name="serial-writer", flip_limiter=None):
+        self.serial_bus = serial_bus
+        self.frame_builder = frame_builder
+        self.panel_diff = panel_diff
+        self.flip_limiter = flip_limiter
+        self.name = name
+        self.mailbox = Mailbox(capacity=1)
+        self.thread = None
+        
+        self.frames_sent = 0
+        self.write_errors = 0
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def submit(self, frame_matrix, atomic=None, copy=True):
+        # copy so the page can keep drawing into its own buffer
+        if atomic is None:
+            atomic = HC.ATOMIC_REFRESH
+        if copy:
+            frame_matrix = np.array(frame_matrix, dtype=np.uint8)
+        return self.mailbox.put((frame_matrix, atomic))
+    
+    def stop(self, timeout=1.0):
+        # the mailbox is drained before the thread exits, so the last frame still goes out
+        self.mailbox.close()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+    
+    def _run(self):
+        item = None
+        while True:
+            # while flips are deferred keep resending the last frame so the panels converge on it
+            draining = self.flip_limiter is not None and self.flip_limiter.pending > 0
+            next_item, _ = self.mailbox.get(HC.FLIP_SPREAD_INTERVAL if draining else None)
+            if next_item is not None:
+                item = next_item
+            elif self.mailbox.closed or not draining:
+                break
+            
+            try:
+                frame_matrix, atomic = item
+                self.transmit(frame_matrix, atomic)
+                self.frames_sent += 1
+            except Exception as e:
+                self.write_errors += 1
+                self.panel_diff.invalidate()
+                print(f"Error writing frame to {self.serial_bus.port_name}: {e}")
+    
+    def transmit(self, frame_matrix, atomic=False):
+        if self.flip_limiter is not None:
+            frame_matrix = self.flip_limiter.apply(frame_matrix)
+        
+        frames = self.frame_builder.construct_frame(frame_matrix, refresh=not atomic)
+        panels = self.panel_diff.changed_panels(frames)
+        
+        if atomic and len(panels) == 1:
+            # a single changed panel cannot tear, so it is shown directly and saves the refresh
+            frames[panels, 1] = self.frame_builder.commands[0]
+            atomic = False
+        
+        # all changed panel packets go out in one write
+        if len(panels) > 0:
+            data = frames[panels].tobytes()
+            if atomic:
+                data += self.frame_builder.refresh_packet
+            self.serial_bus.write(data, len(panels) + int(atomic))
+        
+        self.panel_diff.acknowledge(frames, panels)
+    
+    def get_stats(self):
+        return {
+            "frames_submitted": self.mailbox.submitted,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.mailbox.dropped,
+            "write_errors": self.write_errors,
+        }
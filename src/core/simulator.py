@@ -1,42 +1,72 @@
-import sys
+import _thread
+import os
+import threading
+import time
 import numpy as np
 import pygame
-from core.display import Display, FrameGenerator
+from collections import deque
+from core.display import Display, FrameGenerator, PanelDiff
+from core.flip_limiter import FlipLimiter, bus_flip_budget
+from core.topology import Topology
+from utils.constants import HardwareConstants as HC
 from utils.constants import SimConstants as SC
 
-class Disc(pygame.sprite.Sprite):    
-    def __init__(self, x, y, diameter, color):
-        super().__init__()
-        self.diameter = diameter
-        self.x = x
-        self.y = y
-        self.image = pygame.Surface([self.diameter, self.diameter])
-        self.image.fill(pygame.Color('black'))
-        self.rect = pygame.Rect(self.x, self.y, self.diameter, self.diameter)
-        self.center = (self.x + self.diameter/2, self.y + self.diameter/2)
-        self.color = color
-        self.side = SC.DISC_TOP if self.color == pygame.Color('white') else SC.DISC_BOTTOM
-        self.draw(x, y, diameter)
-    
-    def draw(self, x, y, diameter):
-        self.diameter = diameter
-        self.x = x
-        self.y = y
-        self.image = pygame.Surface([self.diameter, self.diameter])
-        self.image.fill(pygame.Color('black'))
-        self.rect = pygame.Rect(self.x, self.y, self.diameter, self.diameter)
-        pygame.draw.circle(self.image, pygame.Color('white'), (self.diameter/2, self.diameter/2), self.diameter/2)
-        if self.side == SC.DISC_BOTTOM:
-            pygame.draw.circle(self.image, pygame.Color('black'), (self.diameter/2, self.diameter/2), ((1-SC.DISC_BORDER) * self.diameter)/2)
-    
-    def flip(self, side_req):
-        if side_req == SC.DISC_BOTTOM and self.side != side_req:
-            self.side = SC.DISC_BOTTOM
-            pygame.draw.circle(self.image, pygame.Color('black'), (self.diameter/2, self.diameter/2), ((1-SC.DISC_BORDER) * self.diameter)/2)
-        if side_req == SC.DISC_TOP and self.side != side_req:
-            self.side = SC.DISC_TOP
-            self.image.fill(pygame.Color('black'))
-            pygame.draw.circle(self.image, pygame.Color('white'), (self.diameter/2, self.diameter/2), self.diameter/2)
+class DiscGrid:
+    # the whole disc matrix as one array: two pre-rendered disc tiles are blitted at the
+    # positions of changed discs, and only their rectangles are pushed to the window
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.shown = np.zeros((height, width), dtype=np.uint8)
+        self.tiles = None
+        self.positions = None
+        self.disc_size = 0
+        self.rect = None
+    
+    def layout(self, screen_width, screen_height):
+        self.disc_size = max(1, int(screen_width / SC.WINDOW_TO_DISC_RATIO))
+        
+        display_width = self.width * self.disc_size
+        display_height = self.height * self.disc_size
+        display_x = int((screen_width - display_width) / 2)
+        display_y = int((screen_height - display_height) / 3)  # position in upper third of window
+        self.rect = pygame.Rect(display_x, display_y, display_width, display_height)
+        
+        xs = display_x + np.arange(self.width) * self.disc_size
+        ys = display_y + np.arange(self.height) * self.disc_size
+        self.positions = [[(int(x), int(y)) for x in xs] for y in ys]
+        self.tiles = (self._render_tile(SC.DISC_BOTTOM), self._render_tile(SC.DISC_TOP))
+    
+    def _render_tile(self, side):
+        radius = self.disc_size / 2
+        tile = pygame.Surface([self.disc_size, self.disc_size])
+        tile.fill(pygame.Color('black'))
+        pygame.draw.circle(tile, pygame.Color('white'), (radius, radius), radius)
+        if side == SC.DISC_BOTTOM:
+            pygame.draw.circle(tile, pygame.Color('black'), (radius, radius), (1 - SC.DISC_BORDER) * radius)
+        return tile.convert() if pygame.display.get_surface() is not None else tile
+    
+    def draw(self, screen):
+        # full redraw after a resize or on the first frame
+        screen.blits([
+            (self.tiles[self.shown[y, x]], self.positions[y][x])
+            for y in range(self.height) for x in range(self.width)
+        ], doreturn=False)
+        return [self.rect]
+    
+    def update(self, screen, frame):
+        changed = np.argwhere(frame != self.shown)
+        if len(changed) == 0:
+            return []
+        
+        self.shown[:] = frame
+        screen.blits([(self.tiles[self.shown[y, x]], self.positions[y][x]) for y, x in changed], doreturn=False)
+        
+        # many small rectangles cost more than one, merge them once a good part of the grid changed
+        if len(changed) > self.width * self.height // 8:
+            return [self.rect]
+        size = self.disc_size
+        return [pygame.Rect(self.positions[y][x], (size, size)) for y, x in changed]
 
 
 class PushButton(pygame.sprite.Sprite):
@@ -48,8 +78,10 @@ class PushButton(pygame.sprite.Sprite):
         self.width_ratio = width_ratio
         self.height_ratio = height_ratio
         self.pressed = False
+        self.dirty = True
         self.rect = None
         self.font = None
+        self.font_height = None
         self.text = None
         self.text_rect = None
         self.callbacks = []
@@ -62,23 +94,32 @@ class PushButton(pygame.sprite.Sprite):
         self.rect = pygame.Rect(x, y, width, height)
         
         # draw button background
+        screen.fill(pygame.Color('black'), self.rect)
         color = pygame.Color('white') if self.pressed else pygame.Color('grey50')
         pygame.draw.rect(screen, color, self.rect, border_radius=int(height / 2))
         
-        # draw button text
-        self.font = pygame.font.SysFont(None, int(0.8 * height))
-        self.text = self.font.render(self.name, True, pygame.Color('white'))
+        # the font and label only change with the window size
+        font_height = int(0.8 * height)
+        if font_height != self.font_height:
+            self.font = pygame.font.SysFont(None, font_height)
+            self.font_height = font_height
+            self.text = self.font.render(self.name, True, pygame.Color('white'))
         self.text_rect = self.text.get_rect()
         self.text_rect.center = self.rect.center
         screen.blit(self.text, self.text_rect)
+        
+        self.dirty = False
+        return self.rect
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and self.rect.collidepoint(event.pos):
             self.pressed = True
+            self.dirty = True
             return True
         elif event.type == pygame.MOUSEBUTTONUP:
             if self.pressed:
                 self.pressed = False
+                self.dirty = True
                 if self.rect.collidepoint(event.pos):
                     for callback in self.callbacks:
                         callback()
@@ -97,9 +138,11 @@ class Slider(pygame.sprite.Sprite):
         self.width_ratio = width_ratio
         self.height_ratio = height_ratio
         self.pressed = False
+        self.dirty = True
         self.pos = 50  # Default to middle position (0-100)
         self.rect = None
         self.button_rect = None
+        self.button_surface = None
         self.callbacks = []
     
     def draw(self, screen, screen_width, screen_height):
@@ -109,23 +152,29 @@ class Slider(pygame.sprite.Sprite):
         height = int(screen_height * self.height_ratio)
         self.rect = pygame.Rect(x, y, width, height)
         
+        button_diameter = width * 2
+        # the knob overhangs the track, clear everything it can cover
+        area = self.rect.inflate(button_diameter, button_diameter)
+        screen.fill(pygame.Color('black'), area)
+        
         pygame.draw.rect(screen, pygame.Color('grey90'), self.rect, border_radius=int(width/2))
         
         button_y_pos = y + height - (height * self.pos / 100)
-        button_diameter = width * 2
-        
         button_x = x - (button_diameter - width) / 2  # center button horizontally
         self.button_rect = pygame.Rect(button_x, button_y_pos - button_diameter/2, button_diameter, button_diameter)
         
-        button_surface = pygame.Surface([button_diameter, button_diameter])
-        button_surface.fill(pygame.Color('black'))
-        button_surface.set_colorkey(pygame.Color('black'))  # Make black transparent
+        if self.button_surface is None or self.button_surface.get_width() != button_diameter:
+            self.button_surface = pygame.Surface([button_diameter, button_diameter])
+            self.button_surface.fill(pygame.Color('black'))
+            self.button_surface.set_colorkey(pygame.Color('black'))  # Make black transparent
+            pygame.draw.circle(self.button_surface, pygame.Color('white'), 
+                              (button_diameter/2, button_diameter/2), 
+                              button_diameter/2)
         
-        pygame.draw.circle(button_surface, pygame.Color('white'), 
-                          (button_diameter/2, button_diameter/2), 
-                          button_diameter/2)
+        screen.blit(self.button_surface, (button_x, button_y_pos - button_diameter/2))
         
-        screen.blit(button_surface, (button_x, button_y_pos - button_diameter/2))
+        self.dirty = False
+        return area
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -151,6 +200,7 @@ class Slider(pygame.sprite.Sprite):
         self.pos = int(rel_pos / self.rect.h * 100)
         
         self.pos = max(0, min(100, self.pos))
+        self.dirty = True
         
         self._notify_callbacks()
     
@@ -165,56 +215,202 @@ class Slider(pygame.sprite.Sprite):
             callback(self.pos)
 
 
+class BusTimingModel:
+    # replays the timing of one RS485 bus as SerialWriter drives it: a latest-frame-wins slot,
+    # dirty panels in one write at the configured baud rate, the idle gap after each write and
+    # the mechanical flip time, so discs change at the moment they would on the real frame
+    def __init__(self, topology, bus, baudrate=HC.SERIAL_BAUDRATE, flip_limiter=None):
+        self.frame_builder = FrameGenerator(topology, bus)
+        self.panel_diff = PanelDiff(self.frame_builder.panel_count, self.frame_builder.frame_length, HC.FULL_REFRESH_INTERVAL)
+        self.flip_limiter = flip_limiter
+        self.byte_time = HC.SERIAL_BITS_PER_BYTE / baudrate
+        self.panel_index = self.frame_builder.disc_index.reshape(self.frame_builder.panel_count, -1)
+        
+        self.pending = None  # (frame, atomic, submit_time) waiting for the bus
+        self.last_item = None
+        self.bus_idle_time = 0.0
+        self.last_start_time = 0.0
+        self.events = deque()  # (visible_time, flat disc index, disc values) in time order
+        
+        self.frames_submitted = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+    
+    def submit(self, frame_matrix, atomic, now):
+        if self.pending is not None:
+            self.frames_dropped += 1
+        self.pending = ((np.asarray(frame_matrix) != 0).astype(np.uint8), atomic, now)
+        self.frames_submitted += 1
+    
+    def advance(self, now, visible):
+        # start every transmission whose bus slot has come, then show the discs that have flipped by now
+        while self.bus_idle_time <= now:
+            if self.pending is not None:
+                frame_matrix, atomic, submit_time = self.pending
+                self.pending = None
+                self.last_item = (frame_matrix, atomic)
+                self._transmit(frame_matrix, atomic, max(submit_time, self.bus_idle_time))
+            elif (self.flip_limiter is not None and self.flip_limiter.pending > 0 and
+                    self.last_start_time + HC.FLIP_SPREAD_INTERVAL <= now):
+                # the writer keeps resending the last frame until deferred flips are drained
+                frame_matrix, atomic = self.last_item
+                self._transmit(frame_matrix, atomic, max(self.bus_idle_time, self.last_start_time + HC.FLIP_SPREAD_INTERVAL))
+            else:
+                break
+        
+        flat = visible.reshape(-1)
+        while self.events and self.events[0][0] <= now:
+            _, index, values = self.events.popleft()
+            flat[index] = values
+    
+    def next_event_time(self):
+        """Monotonic time at which advance() next changes something, None when the bus is idle."""
+        times = []
+        if self.events:
+            times.append(self.events[0][0])
+        if self.pending is not None:
+            times.append(self.bus_idle_time)
+        elif self.flip_limiter is not None and self.flip_limiter.pending > 0 and self.last_item is not None:
+            times.append(max(self.bus_idle_time, self.last_start_time + HC.FLIP_SPREAD_INTERVAL))
+        return min(times) if times else None
+    
+    def _transmit(self, frame_matrix, atomic, start_time):
+        if self.flip_limiter is not None:
+            frame_matrix = self.flip_limiter.apply(frame_matrix)
+        
+        frames = self.frame_builder.construct_frame(frame_matrix, refresh=not atomic)
+        panels = self.panel_diff.changed_panels(frames)
+        self.panel_diff.acknowledge(frames, panels)
+        self.last_start_time = start_time
+        self.frames_sent += 1
+        if len(panels) == 0:
+            return
+        
+        atomic = atomic and len(panels) > 1
+        packet_time = self.frame_builder.frame_length * self.byte_time
+        write_time = len(panels) * packet_time + (len(self.frame_builder.refresh_packet) * self.byte_time if atomic else 0)
+        self.bus_idle_time = start_time + write_time + HC.SERIAL_PACKET_GAP
+        
+        flat = frame_matrix.reshape(-1)
+        for position, panel in enumerate(panels):
+            # immediate mode shows each panel when its packet ends, atomic mode all at the refresh
+            shown_time = start_time + (write_time if atomic else (position + 1) * packet_time)
+            index = self.panel_index[panel]
+            self.events.append((shown_time + SC.DISC_FLIP_TIME, index, flat[index].copy()))
+        if atomic or len(panels) > 1:
+            self.events = deque(sorted(self.events, key=lambda event: event[0]))
+    
+    def get_stats(self):
+        stats = {
+            "frames_submitted": self.frames_submitted,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "pending_events": len(self.events),
+        }
+        if self.flip_limiter is not None:
+            stats["flips"] = self.flip_limiter.get_stats()
+        return stats
+
+
+class SimStats:
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.start_time = time.perf_counter()
+        self.frames = 0
+        self.encode_time = 0.0
+        self.last_flips = 0
+        self.total_flips = 0
+        self.max_flips = 0
+    
+    def record(self, encode_time, flips):
+        self.frames += 1
+        self.encode_time += encode_time
+        self.last_flips = flips
+        self.total_flips += flips
+        self.max_flips = max(self.max_flips, flips)
+    
+    def summary(self):
+        elapsed = time.perf_counter() - self.start_time
+        frames = max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "fps": round(self.frames / elapsed, 1) if elapsed > 0 else 0.0,
+            "encode_us_mean": round(self.encode_time / frames * 1e6, 2),
+            "flips_last": self.last_flips,
+            "flips_mean": round(self.total_flips / frames, 2),
+            "flips_max": self.max_flips,
+        }
+
+
 class FlipSimDisplay(Display):
-    def __init__(self, caption="FLIPSIM"):
-        super().__init__()
+    def __init__(self, caption="FLIPSIM", topology=None, headless=False, bus_timing=SC.BUS_TIMING):
+        if topology is not None:
+            super().__init__(topology.width, topology.height)
+        else:
+            super().__init__()
         self.caption = caption
+        self.headless = headless  # no window and no frame rate cap, for automated runs
         self.screen = None
         self.clock = None
         self.running = False
-        self.frame_builder = FrameGenerator()
+        topology = topology or Topology.default()
+        # one encoder per bus like the hardware, the buses may use different packet lengths
+        self.frame_builders = [FrameGenerator(topology, bus) for bus in range(len(topology.port_names)) if topology.bus_panels[bus]]
+        limit_flips = HC.MAX_FLIPS_PER_FRAME > 0 or HC.MAX_FLIPS_PER_PANEL > 0
+        
+        # with bus timing the limiter runs per bus at transmit time, like on the hardware
+        self.bus_models = []
+        if bus_timing:
+            for bus in range(len(topology.port_names)):
+                if topology.bus_panels[bus]:
+                    flip_limiter = FlipLimiter(bus_flip_budget(topology, bus), topology=topology, bus=bus) if limit_flips else None
+                    self.bus_models.append(BusTimingModel(topology, bus, flip_limiter=flip_limiter))
+        elif limit_flips:
+            self.flip_limiter = FlipLimiter(topology=topology)
         
         # Simulator components
-        self.discs = []
+        self.grid = DiscGrid(self.width, self.height)
         self.button_left = None
         self.button_right = None
         self.slider = None
-        self.all_sprites = None
+        self.full_redraw = True
+        self.decoded_frame = np.zeros((self.height, self.width), dtype=np.uint8)
+        self.last_frame = None  # last requested frame, shown again while the limiter defers flips
+        self.last_present_time = 0.0
+        self.stats = SimStats()
+        
+        self.event_loop_active = False
+        self.owner_thread = None  # thread that opened the window
+        self.frame_lock = threading.Lock()
+        self.posted_frame = None  # (frame, atomic, post time) for the event loop's next tick
+        self.frames_posted = 0
+        self.posted_dropped = 0  # replaced by a newer frame before the event loop showed them
+        self.posted_shown = 0
+        self.last_post_lag = 0.0
+        self.max_post_lag = 0.0
+        self.total_post_lag = 0.0
+        self.quit_callbacks = []
     
     def initialize(self):
+        if self.headless:
+            # render into an offscreen surface, SDL never opens a window. Without a window no one
+            # pumps SDL's events, so keep SIGINT/SIGTERM with Python instead of SDL's quit event
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+        
+        self.owner_thread = threading.current_thread()
         pygame.init()
         pygame.display.set_caption(self.caption)
         
         # set screen size
-        self.screen = pygame.display.set_mode((SC.WINDOW_WIDTH_INIT, SC.WINDOW_HEIGHT_INIT), pygame.RESIZABLE)
+        flags = 0 if self.headless else pygame.RESIZABLE
+        self.screen = pygame.display.set_mode((SC.WINDOW_WIDTH_INIT, SC.WINDOW_HEIGHT_INIT), flags)
         self.screen.fill(pygame.Color('black'))
         
         self.clock = pygame.time.Clock()
-        self.all_sprites = pygame.sprite.Group()
-        
-        screen_width, screen_height = self.screen.get_size()
-        disc_size = screen_width / SC.WINDOW_TO_DISC_RATIO
-        
-        # calculate display position
-        display_width = self.width * disc_size
-        display_height = self.height * disc_size
-        display_x = (screen_width - display_width) / 2
-        display_y = (screen_height - display_height) / 3  # position in upper third of window
-        
-        # create discs for each row, then append rows to the list
-        self.discs = []
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                disc = Disc(
-                    display_x + x * disc_size,
-                    display_y + y * disc_size,
-                    disc_size,
-                    pygame.Color('black')
-                )
-                row.append(disc)
-                self.all_sprites.add(disc)
-            self.discs.append(row)
+        self.grid.layout(*self.screen.get_size())
         
         # button and slider for the simulator
         self.button_left = PushButton(
@@ -241,50 +437,181 @@ class FlipSimDisplay(Display):
         )
         
         self.running = True
+        self.stats.reset()
         return True
     
-    def send_frame(self, frame_matrix):
+    def send_frame(self, frame_matrix, atomic=None):
         if not self.running:
             return
         
-        # update disc states based on frame matrix
-        for y in range(min(self.height, len(self.discs))):
-            for x in range(min(self.width, len(self.discs[y]))):
-                side = SC.DISC_TOP if frame_matrix[y, x] > 0 else SC.DISC_BOTTOM
-                self.discs[y][x].flip(side)
+        # the window is only touched from the thread that opened it (macOS needs the main thread):
+        # with the event loop running, or from any other thread, the frame is only posted and
+        # the event loop shows it on its next tick
+        if self.event_loop_active or (not self.headless and threading.current_thread() is not self.owner_thread):
+            with self.frame_lock:
+                if self.posted_frame is not None:
+                    self.posted_dropped += 1
+                self.posted_frame = (np.array(frame_matrix, dtype=np.uint8), atomic, time.monotonic())
+                self.frames_posted += 1
+            return
         
-        self._process_events()
+        if not self.headless:
+            self._process_events()
+            if not self.running:
+                return
         
-        self.screen.fill(pygame.Color('black'))
-        self.all_sprites.draw(self.screen)
+        self._present(frame_matrix, atomic)
         
+        if not self.headless:
+            self.clock.tick(SC.SIM_FPS)
+    
+    def run_event_loop(self):
+        # blocks on the calling thread (the one that called initialize) pumping input and redrawing
+        # at SIM_EVENT_FPS, independent of how often frames are submitted. Returns when the window closes
+        self.event_loop_active = True
+        try:
+            while self.running:
+                self._process_events()
+                if not self.running:
+                    break
+                
+                with self.frame_lock:
+                    posted = self.posted_frame
+                    self.posted_frame = None
+                
+                if posted is not None:
+                    frame_matrix, atomic, post_time = posted
+                    self._present(frame_matrix, atomic)
+                    self.last_post_lag = time.monotonic() - post_time
+                    self.max_post_lag = max(self.max_post_lag, self.last_post_lag)
+                    self.total_post_lag += self.last_post_lag
+                    self.posted_shown += 1
+                elif not self._service():
+                    self._draw(None)
+                
+                self.clock.tick(SC.SIM_EVENT_FPS)
+        finally:
+            self.event_loop_active = False
+    
+    def stop_event_loop(self):
+        self.running = False
+    
+    def service(self):
+        # without the event loop nothing else shows the discs that land or the flips the limiter
+        # deferred between submitted frames, so the frame loop calls this while it idles
+        if not self.running or self.event_loop_active:
+            return
+        if not self.headless and threading.current_thread() is not self.owner_thread:
+            return
+        self._service()
+    
+    def time_until_service(self):
+        if not self.running or self.event_loop_active:
+            return None
+        return self._time_until_work(time.monotonic())
+    
+    def _time_until_work(self, now):
+        if self.bus_models:
+            times = [event_time for event_time in (bus_model.next_event_time() for bus_model in self.bus_models) if event_time is not None]
+            return max(0.0, min(times) - now) if times else None
+        if self.flip_limiter is not None and self.flip_limiter.pending > 0 and self.last_frame is not None:
+            # the hardware writer resends the last frame at this interval until it is drained
+            return max(0.0, self.last_present_time + HC.FLIP_SPREAD_INTERVAL - now)
+        return None
+    
+    def _service(self):
+        """Show what has become due since the last frame, returns whether anything was presented."""
+        delay = self._time_until_work(time.monotonic())
+        if delay is None or delay > 0:
+            return False
+        if self.bus_models:
+            self._present(None, None)
+        else:
+            self._present(self.last_frame, None)
+        return True
+    
+    def _present(self, frame_matrix, atomic):
+        # show what the panels would decode from the serial packets, not the page frame itself
+        encode_start = time.perf_counter()
+        if self.bus_models:
+            now = time.monotonic()
+            if atomic is None:
+                atomic = HC.ATOMIC_REFRESH
+            for bus_model in self.bus_models:
+                if frame_matrix is not None:
+                    bus_model.submit(frame_matrix, atomic, now)
+                bus_model.advance(now, self.decoded_frame)
+            shown = self.decoded_frame
+        else:
+            if self.flip_limiter is not None:
+                if frame_matrix is not self.last_frame:
+                    # the caller may reuse its buffer for the next frame
+                    self.last_frame = np.array(frame_matrix, dtype=np.uint8)
+                self.last_present_time = time.monotonic()
+                frame_matrix = self.flip_limiter.apply(frame_matrix)
+            for frame_builder in self.frame_builders:
+                frames = frame_builder.construct_frame(np.asarray(frame_matrix))
+                frame_builder.decode_frame(frames, out=self.decoded_frame)
+            shown = self.decoded_frame
+        
+        if frame_matrix is not None:
+            encode_time = time.perf_counter() - encode_start
+            self.stats.record(encode_time, int(np.count_nonzero(shown != self.grid.shown)))
+        
+        self._draw(shown)
+    
+    def _draw(self, frame_matrix):
+        dirty_rects = []
+        if self.full_redraw:
+            self.screen.fill(pygame.Color('black'))
+            if frame_matrix is not None:
+                self.grid.shown[:] = frame_matrix
+            dirty_rects.extend(self.grid.draw(self.screen))
+            self.button_left.dirty = self.button_right.dirty = self.slider.dirty = True
+        elif frame_matrix is not None:
+            dirty_rects.extend(self.grid.update(self.screen, frame_matrix))
+        
+        # the buttons and slider are only redrawn when they change
         screen_width, screen_height = self.screen.get_size()
-        self.button_left.draw(self.screen, screen_width, screen_height)
-        self.button_right.draw(self.screen, screen_width, screen_height)
-        self.slider.draw(self.screen, screen_width, screen_height)
+        for widget in (self.button_left, self.button_right, self.slider):
+            if widget.dirty:
+                dirty_rects.append(widget.draw(self.screen, screen_width, screen_height))
         
         # this is what updates the screen
-        pygame.display.flip()
-        
-        self.clock.tick(SC.SIM_FPS)
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
     
     def _process_events(self):
+        resize_event = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
-                pygame.quit()
-                sys.exit()
+                self._notify_quit()
+                return
             elif event.type == pygame.VIDEORESIZE:
-                # Handle window resize
-                self._handle_resize(event)
+                # a drag produces a burst of resizes, only the last one matters
+                resize_event = event
             else:
-                # Let UI elements handle the event
+                # Let UI elements handle the event, their callbacks run right here
                 handled = False
                 handled |= self.button_left.handle_event(event)
                 handled |= self.button_right.handle_event(event)
                 handled |= self.slider.handle_event(event)
+        
+        if resize_event is not None:
+            self._handle_resize(resize_event)
+    
+    def _notify_quit(self):
+        if self.quit_callbacks:
+            for callback in self.quit_callbacks:
+                callback()
+        elif not self.event_loop_active:
+            # nobody is listening, stop the application the way Ctrl-C would
+            _thread.interrupt_main()
     
-    # TODO: this still doesn't really work 
     def _handle_resize(self, event):
         screen_width = int(event.h * SC.WINDOW_ASPECT_RATIO)
         screen_height = event.h
@@ -300,21 +627,9 @@ class FlipSimDisplay(Display):
         
         self.screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
         
-        disc_size = screen_width * SC.WINDOW_TO_DISC_RATIO
-        
-        display_width = self.width * disc_size
-        display_height = self.height * disc_size
-        display_x = (screen_width - display_width) / 2
-        display_y = (screen_height - display_height) / 3
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                if y < len(self.discs) and x < len(self.discs[y]):
-                    self.discs[y][x].draw(
-                        display_x + x * disc_size,
-                        display_y + y * disc_size,
-                        disc_size
-                    )
+        # only the two disc tiles are re-rendered, the grid is redrawn from its state
+        self.grid.layout(screen_width, screen_height)
+        self.full_redraw = True
     
     def register_button_callback(self, button, callback):
         if button == 'left' and self.button_left:
@@ -329,6 +644,28 @@ class FlipSimDisplay(Display):
     def get_slider_value(self):
         return self.slider.get_value() if self.slider else 50
     
+    def register_quit_callback(self, callback):
+        self.quit_callbacks.append(callback)
+    
+    def get_post_stats(self):
+        # frames handed to the event loop by send_frame, from post to shown
+        return {
+            "frames_posted": self.frames_posted,
+            "frames_dropped": self.posted_dropped,
+            "queue_depth": 0 if self.posted_frame is None else 1,
+            "lag_ms_last": round(self.last_post_lag * 1000, 2),
+            "lag_ms_max": round(self.max_post_lag * 1000, 2),
+            "lag_ms_mean": round(self.total_post_lag / self.posted_shown * 1000, 2) if self.posted_shown else 0.0,
+        }
+    
+    def get_stats(self):
+        stats = self.stats.summary()
+        for bus, bus_model in enumerate(self.bus_models):
+            stats[f"bus_{bus}"] = bus_model.get_stats()
+        if self.flip_limiter is not None:
+            stats["flips"] = self.flip_limiter.get_stats()
+        return stats
+    
     def cleanup(self):
         if pygame.get_init():
             pygame.quit()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import threading
+import time
+import numpy as np
+
+from core.display import Display
+from core.mailbox import Mailbox
+from utils.constants import DisplayConstants as DC
+
+
+class SinkWorker:
+    # runs one display on its own thread; every call into the display (initialize, send_frame,
+    # cleanup) happens on that thread so a slow sink only ever delays itself
+    def __init__(self, display, queue_size=DC.TEE_QUEUE_SIZE):
+        self.display = display
+        self.name = display.__class__.__name__
+        self.mailbox = Mailbox(capacity=queue_size)
+        self.thread = None
+        self.ready = threading.Event()
+        self.initialized = False
+        
+        self.frames_sent = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"tee-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def submit(self, frame_matrix, atomic=None):
+        return self.mailbox.put((frame_matrix, atomic))
+    
+    def stop(self, timeout=1.0):
+        self.mailbox.close()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+    
+    def _run(self):
+        try:
+            result = self.display.initialize()
+            self.initialized = result is not False
+        except Exception as e:
+            print(f"Error initializing display sink {self.name}: {e}")
+        finally:
+            self.ready.set()
+        
+        if self.initialized:
+            while True:
+                item, put_time = self.mailbox.get()
+                if item is None:
+                    break
+                
+                try:
+                    frame_matrix, atomic = item
+                    self.display.send_frame(frame_matrix, atomic)
+                    self.frames_sent += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error sending frame to display sink {self.name}: {e}")
+                
+                self.last_lag = time.monotonic() - put_time
+                self.max_lag = max(self.max_lag, self.last_lag)
+                self.total_lag += self.last_lag
+        
+        try:
+            self.display.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up display sink {self.name}: {e}")
+    
+    def get_stats(self):
+        return {
+            "frames_submitted": self.mailbox.submitted,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.mailbox.dropped,
+            "queue_depth": len(self.mailbox),
+            "errors": self.errors,
+            "lag_ms_last": round(self.last_lag * 1000, 2),
+            "lag_ms_max": round(self.max_lag * 1000, 2),
+            "lag_ms_mean": round(self.total_lag / self.frames_sent * 1000, 2) if self.frames_sent else 0.0,
+        }
+
+
+class EventLoopSink:
+    # a display with its own event loop (the windowed simulator) must stay on the main thread,
+    # so instead of a worker it is initialized and cleaned up on the caller's thread and its
+    # send_frame only posts the frame for the event loop to show on its next tick
+    def __init__(self, display):
+        self.display = display
+        self.name = display.__class__.__name__
+        self.ready = threading.Event()
+        self.initialized = False
+        
+        self.frames_submitted = 0
+        self.errors = 0
+    
+    def start(self):
+        try:
+            result = self.display.initialize()
+            self.initialized = result is not False
+        except Exception as e:
+            print(f"Error initializing display sink {self.name}: {e}")
+        finally:
+            self.ready.set()
+    
+    def submit(self, frame_matrix, atomic=None):
+        if not self.initialized:
+            return False
+        
+        self.frames_submitted += 1
+        try:
+            self.display.send_frame(frame_matrix, atomic)
+            return True
+        except Exception as e:
+            self.errors += 1
+            print(f"Error sending frame to display sink {self.name}: {e}")
+            return False
+    
+    def stop(self, timeout=1.0):
+        try:
+            self.display.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up display sink {self.name}: {e}")
+    
+    def get_stats(self):
+        # the display's posted-frame slot plays the part of SinkWorker's mailbox: a frame the
+        # event loop has not shown before the next one arrives is dropped. Frames sent while the
+        # event loop is not running are shown right away and have no lag
+        post_stats = self.display.get_post_stats()
+        return {
+            "frames_submitted": self.frames_submitted,
+            "frames_sent": self.frames_submitted - self.errors - post_stats["frames_dropped"] - post_stats["queue_depth"],
+            "frames_dropped": post_stats["frames_dropped"],
+            "queue_depth": post_stats["queue_depth"],
+            "errors": self.errors,
+            "lag_ms_last": post_stats["lag_ms_last"],
+            "lag_ms_max": post_stats["lag_ms_max"],
+            "lag_ms_mean": post_stats["lag_ms_mean"],
+        }
+
+
+class TeeDisplay(Display):
+    # fans each frame out to several displays, e.g. hardware + simulator + recorder
+    def __init__(self, displays, queue_size=DC.TEE_QUEUE_SIZE):
+        first = displays[0]
+        super().__init__(first.width, first.height)
+        self.workers = [
+            EventLoopSink(display) if hasattr(display, 'run_event_loop') else SinkWorker(display, queue_size)
+            for display in displays
+        ]
+    
+    def initialize(self):
+        for worker in self.workers:
+            worker.start()
+        
+        # callers may register callbacks on a sink right after this returns
+        for worker in self.workers:
+            worker.ready.wait()
+        return any(worker.initialized for worker in self.workers)
+    
+    def send_frame(self, frame_matrix, atomic=None):
+        # one copy shared by every sink, no sink may modify it
+        frame_matrix = np.array(frame_matrix, dtype=np.uint8)
+        frame_matrix.flags.writeable = False
+        for worker in self.workers:
+            worker.submit(frame_matrix, atomic)
+    
+    def service(self):
+        # sinks on worker threads service themselves, only event loop sinks share this thread
+        for worker in self.workers:
+            if isinstance(worker, EventLoopSink) and worker.initialized:
+                worker.display.service()
+    
+    def time_until_service(self):
+        delays = [
+            worker.display.time_until_service() for worker in self.workers
+            if isinstance(worker, EventLoopSink) and worker.initialized
+        ]
+        delays = [delay for delay in delays if delay is not None]
+        return min(delays) if delays else None
+    
+    def find_sink(self, attribute):
+        for worker in self.workers:
+            if hasattr(worker.display, attribute):
+                return worker.display
+        return None
+    
+    def get_stats(self):
+        return {worker.name: worker.get_stats() for worker in self.workers}
+    
+    def cleanup(self):
+        for worker in self.workers:
+            worker.stop()
@@ -0,0 +1,70 @@
+import json
+import numpy as np
+from utils.constants import DisplayConstants as DC
+from utils.constants import HardwareConstants as HC
+
+
+class PanelSpec:
+    # one Alfazeta panel on the canvas. Each packet byte is one canvas row of 7 discs
+    # starting at column x, and the panel spans `columns` rows starting at row y
+    def __init__(self, address, x, y, bus=0, columns=DC.PANEL_ROW_HEIGHT_COUNT):
+        self.address = address
+        self.x = x
+        self.y = y
+        self.bus = bus
+        self.columns = columns
+        self.discs = DC.ROW_DISC_WIDTH_COUNT
+    
+    def disc_index(self, canvas_width):
+        # flat canvas index of every disc, shaped (columns, discs)
+        rows = np.arange(self.y, self.y + self.columns)[:, None]
+        cols = np.arange(self.x, self.x + self.discs)[None, :]
+        return rows * canvas_width + cols
+
+
+class Topology:
+    def __init__(self, width, height, panels, port_names):
+        self.width = width
+        self.height = height
+        self.panels = list(panels)
+        self.port_names = list(port_names)
+        
+        covered = np.zeros((height, width), dtype=np.uint8)
+        for panel in self.panels:
+            if panel.columns not in DC.DATA_COMMANDS:
+                raise ValueError(f"Unsupported panel length {panel.columns} for panel {panel.address}")
+            if not 0 <= panel.bus < len(self.port_names):
+                raise ValueError(f"Panel {panel.address} is on unknown bus {panel.bus}")
+            if panel.x < 0 or panel.y < 0 or panel.x + panel.discs > width or panel.y + panel.columns > height:
+                raise ValueError(f"Panel {panel.address} does not fit on the {width}x{height} canvas")
+            covered[panel.y:panel.y + panel.columns, panel.x:panel.x + panel.discs] += 1
+        
+        if covered.max(initial=0) > 1:
+            raise ValueError("Panels overlap")
+        
+        # panels are encoded and sent per bus, each bus needs one packet length
+        self.bus_panels = []
+        for bus in range(len(self.port_names)):
+            panels = [panel for panel in self.panels if panel.bus == bus]
+            if len({panel.columns for panel in panels}) > 1:
+                raise ValueError(f"Panels on bus {bus} have different lengths")
+            self.bus_panels.append(panels)
+    
+    @classmethod
+    def default(cls):
+        panel_ids = [DC.PANEL_0_ID, DC.PANEL_1_ID, DC.PANEL_2_ID, DC.PANEL_3_ID]
+        panels = [
+            PanelSpec(address, panel * DC.ROW_DISC_WIDTH_COUNT, 0)
+            for panel, address in enumerate(panel_ids)
+        ]
+        return cls(DC.DISPLAY_DISC_WIDTH_COUNT, DC.DISPLAY_DISC_HEIGHT_COUNT, panels, [HC.SERIAL_PORT_NAME])
+    
+    @classmethod
+    def from_file(cls, path):
+        # {"width": 56, "height": 28, "buses": ["/dev/ttyAMA0", ...],
+        #  "panels": [{"address": 1, "x": 0, "y": 0, "bus": 0}, ...]}
+        with open(path, 'r') as f:
+            data = json.load(f)
+        
+        panels = [PanelSpec(**panel) for panel in data['panels']]
+        return cls(data['width'], data['height'], panels, data['buses'])
@@ -12,7 +12,14 @@ IMAGE_WIDTH = 320
 IMAGE_HEIGHT = 240
 
 def init(use_simulator=False):
-    global capture, picam2, mp_face_mesh, mp_drawing, face_mesh
+    if not open_camera(use_simulator):
+        return False
+    load_face_mesh()
+    return True
+
+
+def open_camera(use_simulator=False):
+    global capture, picam2
     
     if use_simulator:
         capture = cv2.VideoCapture(0)
@@ -32,7 +39,13 @@ def init(use_simulator=False):
         )
         picam2.configure(config)
         picam2.start()
+    
+    return True
+
 
+def load_face_mesh():
+    global mp_face_mesh, mp_drawing, face_mesh
+    
     mp_face_mesh = mp.solutions.face_mesh
     mp_drawing = mp.solutions.drawing_utils
     face_mesh = mp_face_mesh.FaceMesh(
@@ -105,15 +118,27 @@ def get_face_landmarks(frame):
     return landmarks_array
 
 def cleanup():
-    global capture, picam2, face_mesh
+    close_camera()
+    cv2.destroyAllWindows()
+    release_face_mesh()
+
+
+def close_camera():
+    global capture, picam2
     
     if capture is not None and capture.isOpened():
         capture.release()
+    capture = None
     
     if picam2 is not None:
         picam2.stop()
-    
-    cv2.destroyAllWindows()
+        picam2.close()
+    picam2 = None
+
+
+def release_face_mesh():
+    global face_mesh
     
     if face_mesh is not None:
-        face_mesh.close()
\ No newline at end of file
+        face_mesh.close()
+    face_mesh = None
\ No newline at end of file
@@ -20,6 +20,9 @@ def init():
 
 
 def detect_gestures(frame):
+    if hands is None:
+        return None
+    
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     rgb_frame.flags.writeable = False
     results = hands.process(rgb_frame)
@@ -87,4 +90,5 @@ def cleanup():
     global hands
     
     if hands is not None:
-        hands.close()
\ No newline at end of file
+        hands.close()
+    hands = None
\ No newline at end of file
@@ -0,0 +1,165 @@
+import gc
+import threading
+import time
+
+from core.metrics import metrics
+from utils.constants import DetectionConstants as DTC
+
+CAMERA = "camera"
+LANDMARK_DETECTION = "landmark_detection"
+GESTURE_DETECTION = "gesture_detection"
+
+
+class DetectionManager:
+    # brings up the camera and each detection model only while the current page's
+    # camera_features ask for it, and releases them once no page has needed them for
+    # idle_timeout seconds. cv2 and mediapipe are not imported until something is loaded.
+    # Each resource has its own lock so a release never races a frame still being processed
+    def __init__(self, use_simulator=False, idle_timeout=DTC.IDLE_RELEASE_TIMEOUT, debug=False):
+        self.use_simulator = use_simulator
+        self.idle_timeout = idle_timeout
+        self.debug = debug
+        
+        self.camera = None  # detection.camera, once imported
+        self.gesture = None  # detection.gesture, once imported
+        
+        self.features = (CAMERA, LANDMARK_DETECTION, GESTURE_DETECTION)
+        self.loaded = {feature: False for feature in self.features}
+        self.last_used = {feature: 0.0 for feature in self.features}
+        self.failed_at = {feature: None for feature in self.features}
+        self.locks = {feature: threading.Lock() for feature in self.features}
+        self.needed = set()  # what the last update() was asked for
+        
+        self.loads = 0
+        self.releases = 0
+    
+    @property
+    def active(self):
+        return any(self.loaded.values())
+    
+    def update(self, camera_features):
+        """Load what camera_features needs and release what has been idle, call once per frame
+        with the current page's camera_features (None when it uses none)."""
+        now = time.monotonic()
+        needed = set(camera_features or ())
+        if needed:
+            needed.add(CAMERA)
+        self.needed = needed
+        
+        for feature in self.features:
+            if feature in needed:
+                self.last_used[feature] = now
+                if not self.loaded[feature]:
+                    self._load(feature, now)
+            elif self.loaded[feature] and now - self.last_used[feature] >= self.idle_timeout:
+                self._release(feature)
+    
+    def time_until_release(self):
+        """Seconds until update() releases the next idle resource, None when none is waiting to be
+        released. A loop that idles must call update() again by then."""
+        now = time.monotonic()
+        delays = [
+            max(0.0, self.last_used[feature] + self.idle_timeout - now) for feature in self.features
+            if self.loaded[feature] and feature not in self.needed
+        ]
+        return min(delays) if delays else None
+    
+    def get_frame(self):
+        with self.locks[CAMERA]:
+            if not self.loaded[CAMERA]:
+                return None
+            start = time.perf_counter()
+            frame = self.camera.get_frame(debug=self.debug)
+            metrics.record("camera.get_frame", time.perf_counter() - start)
+            return frame
+    
+    def get_face_landmarks(self, frame):
+        with self.locks[LANDMARK_DETECTION]:
+            if not self.loaded[LANDMARK_DETECTION]:
+                return None
+            start = time.perf_counter()
+            face_landmarks = self.camera.get_face_landmarks(frame)
+            metrics.record("camera.get_face_landmarks", time.perf_counter() - start)
+            return face_landmarks
+    
+    def detect_gestures(self, frame):
+        with self.locks[GESTURE_DETECTION]:
+            if not self.loaded[GESTURE_DETECTION]:
+                return None
+            start = time.perf_counter()
+            gestures = self.gesture.detect_gestures(frame)
+            metrics.record("gesture.detect_gestures", time.perf_counter() - start)
+            return gestures
+    
+    def release_all(self):
+        for feature in self.features:
+            if self.loaded[feature]:
+                self._release(feature)
+    
+    def get_stats(self):
+        now = time.monotonic()
+        return {
+            "loaded": [feature for feature in self.features if self.loaded[feature]],
+            "loads": self.loads,
+            "releases": self.releases,
+            "idle_s": {feature: round(now - self.last_used[feature], 1) for feature in self.features if self.loaded[feature]},
+        }
+    
+    def _load(self, feature, now):
+        # a resource that failed to come up is retried after a while rather than every frame
+        failed_at = self.failed_at[feature]
+        if failed_at is not None and now - failed_at < DTC.RETRY_INTERVAL:
+            return
+        
+        with self.locks[feature]:
+            try:
+                start = time.perf_counter()
+                loaded = self._load_feature(feature)
+                if loaded:
+                    print(f"Loaded {feature} in {time.perf_counter() - start:.2f}s")
+            except ImportError as e:
+                print(f"Warning: {feature} not available: {e}")
+                loaded = False
+            except Exception as e:
+                print(f"Error loading {feature}: {e}")
+                loaded = False
+            
+            self.loaded[feature] = loaded
+            self.failed_at[feature] = None if loaded else now
+            if loaded:
+                self.loads += 1
+    
+    def _load_feature(self, feature):
+        if feature == CAMERA:
+            from detection import camera
+            self.camera = camera
+            return camera.open_camera(self.use_simulator) is not False
+        elif feature == LANDMARK_DETECTION:
+            from detection import camera
+            self.camera = camera
+            camera.load_face_mesh()
+            return True
+        elif feature == GESTURE_DETECTION:
+            from detection import gesture
+            self.gesture = gesture
+            return gesture.init() is not False
+        return False
+    
+    def _release(self, feature):
+        with self.locks[feature]:
+            try:
+                if feature == CAMERA:
+                    self.camera.close_camera()
+                elif feature == LANDMARK_DETECTION:
+                    self.camera.release_face_mesh()
+                elif feature == GESTURE_DETECTION:
+                    self.gesture.cleanup()
+            except Exception as e:
+                print(f"Error releasing {feature}: {e}")
+            
+            self.loaded[feature] = False
+            self.releases += 1
+        
+        # the models hold large native buffers, hand them back now rather than at some later GC
+        gc.collect()
+        print(f"Released {feature}")
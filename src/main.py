@@ -1,51 +1,49 @@
 import argparse
+import asyncio
+import threading
 import time
 import sys
 import numpy as np
 import traceback
-
-from detection import camera as camera_module
-from detection import gesture as gesture_module
+from concurrent.futures import ThreadPoolExecutor
 
 from core.display import create_display_adapter
+from core.metrics import metrics
+from core.pipeline import Pipeline
+from core.profiler import Profiler
+from core.scheduler import FrameScheduler
+from core.topology import Topology
 from core.page_manager import PageManager
 from core.input_manager import InputManager, InputEvent
 from core.mqtt_manager import MQTTManager
+from detection.manager import DetectionManager
+from utils.constants import DisplayConstants as DC
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0 or number == float("inf"):
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value}")
+    return number
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="FlipDisc Display Application")
     parser.add_argument("-s", "--sim", action="store_true", help="Use simulator")
+    parser.add_argument("--headless", action="store_true", help="Run the simulator without a window or frame rate cap")
+    parser.add_argument("--bus-timing", action="store_true", help="Show discs in the simulator when the serial bus would deliver them")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("--flip", action="store_true", help="Flip display output upside down")
-    return parser.parse_args()
-
-
-def setup_camera(use_simulator=False):
-    camera_module = None
-    camera_initialized = False
-    
-    try:
-        camera_initialized = camera_module.init(use_simulator)
-    except ImportError as e:
-        print(f"Warning: Camera module not available: {e}")
-    except Exception as e:
-        print(f"Error initializing camera: {e}")
-    
-    return camera_module, camera_initialized
-
-
-def setup_gesture_detection():
-    gesture_module = None
-    gesture_initialized = False
-    
-    try:
-        gesture_initialized = gesture_module.init()
-    except ImportError as e:
-        print(f"Warning: Gesture module not available: {e}")
-    except Exception as e:
-        print(f"Error initializing gesture detection: {e}")
-    
-    return gesture_module, gesture_initialized
+    parser.add_argument("--fps", type=positive_float, default=DC.FRAME_RATE, help="Target frame rate of the main loop")
+    runtime = parser.add_mutually_exclusive_group()
+    runtime.add_argument("--pipeline", action="store_true", help="Run capture, inference and render as separate threads")
+    runtime.add_argument("--asyncio", action="store_true", help="Run frame ticks, sensor polling and MQTT on one asyncio event loop")
+    parser.add_argument("--topology", help="JSON file describing panel positions, addresses and buses")
+    parser.add_argument("--record", metavar="PATH", help="Write frames to a binary frame log instead of a display")
+    parser.add_argument("--tee", action="store_true", help="Drive the hardware together with --sim and/or --record")
+    args = parser.parse_args()
+    if args.headless:
+        args.sim = True
+    return args
 
 
 def register_pages(page_manager):
@@ -70,13 +68,27 @@ def register_pages(page_manager):
         return False
 
 def main():
+    start_time = time.monotonic()
     args = parse_args()
 
-    display = create_display_adapter(use_simulator=args.sim)
+    topology = Topology.from_file(args.topology) if args.topology else None
+    display = create_display_adapter(use_simulator=args.sim, topology=topology, record_path=args.record, tee=args.tee, headless=args.headless, bus_timing=args.bus_timing)
     display.initialize()
     page_manager = PageManager(display)
-    mqtt_manager = MQTTManager(page_manager)
-    mqtt_manager.initialize()
+    
+    def profile_context():
+        return {
+            "page": page_manager.current_page_id,
+            "pattern": getattr(page_manager.current_page, 'current_pattern_key', None),
+            "stages": metrics.summary()["stages"],
+        }
+    
+    profiler = Profiler(context=profile_context)
+    profiler.install_signal_handlers()
+    
+    mqtt_manager = MQTTManager(page_manager, profiler=profiler)
+    if not args.asyncio:
+        mqtt_manager.initialize()
     if not register_pages(page_manager):
         print("Error: No pages available")
         return 1
@@ -88,25 +100,30 @@ def main():
         return 1
     
     try:   
+        # input callbacks run on GPIO, polling or simulator threads, so they only post commands
+        # that the frame loop applies between frames
         def handle_secondary_button():
             if page_manager.current_page and hasattr(page_manager.current_page, 'handle_secondary_button'):
                 page_manager.current_page.handle_secondary_button()
         
         def handle_slider_change():
             value = input_manager.slider_value
-            page_manager.handle_slider_change(value)
+            page_manager.post_slider_change(value)
 
-        input_manager.register_callback(InputEvent.PRIMARY, page_manager.next_page)
-        input_manager.register_callback(InputEvent.SECONDARY, handle_secondary_button)
+        input_manager.register_callback(InputEvent.PRIMARY, page_manager.post_next_page)
+        input_manager.register_callback(InputEvent.SECONDARY, lambda: page_manager.post(handle_secondary_button))
         # input_manager.register_callback(InputEvent.VALUE_CHANGE, handle_slider_change)
         
-        input_manager.initialize_hardware()
+        input_manager.initialize_hardware(poll_threads=not args.asyncio)
         
         if args.sim:
-            input_manager.initialize_simulator(display)
+            simulator = display.find_sink('register_button_callback') if args.tee else display
+            input_manager.initialize_simulator(simulator)
         
-        camera_module, camera_initialized = setup_camera(use_simulator=args.sim)
-        gesture_module, gesture_initialized = setup_gesture_detection()
+        # the camera and each model are only loaded while the current page's camera_features
+        # need them, and released again once they have been idle for a while
+        detection = DetectionManager(use_simulator=args.sim, debug=args.debug)
+        metrics.register_source("detection", detection.get_stats)
         
         # go to first page
         page_ids = page_manager.get_page_ids()
@@ -116,64 +133,300 @@ def main():
             print("Error: No pages registered")
             return 1
         
-        running = True
-        last_frame_time = time.time()
+        stop_event = threading.Event()
         
-        try:
-            while running:
-                camera_frame = None
-                face_landmarks = None
-                gestures = None
+        scheduler = FrameScheduler(args.fps)
+        metrics.register_source("scheduler", scheduler.get_stats)
+        metrics.register_source("pages", page_manager.get_stats)
+        metrics.register_source("commands", page_manager.commands.get_stats)
+        if hasattr(display, 'get_stats'):
+            metrics.register_source("display", display.get_stats)
+        
+        def get_camera_features():
+            metadata = page_manager.get_page_metadata(page_manager.current_page_id)
+            return metadata.get("camera_features") if metadata else None
+        
+        def capture_camera_frame(camera_features):
+            detection.update(camera_features)
+            if camera_features is None:
+                return None
+            
+            try:
+                return detection.get_frame()
+            except Exception as e:
+                print(f"Error getting camera frame: {e}")
+                return None
+        
+        def detect_features(camera_features, camera_frame):
+            face_landmarks = None
+            gestures = None
+            
+            if camera_features is None or camera_frame is None:
+                return face_landmarks, gestures
+            
+            if "landmark_detection" in camera_features:
+                try:
+                    face_landmarks = detection.get_face_landmarks(camera_frame)
+                except Exception as e:
+                    print(f"Error getting face landmarks: {e}")
+            
+            if "gesture_detection" in camera_features:
+                try:
+                    gestures = detection.detect_gestures(camera_frame)
+                    
+                    # navigation from gestures changes pages, so it runs on the frame loop's thread
+                    if gestures:
+                        page_manager.post(input_manager.process_gestures, gestures, key="input.gestures")
+                except Exception as e:
+                    print(f"Error detecting gestures: {e}")
+            
+            return face_landmarks, gestures
+        
+        def render_frame(camera_frame, face_landmarks, gestures):
+            # update the page, then only render and encode when the page's frame changed
+            page_manager.update(camera_frame, face_landmarks, gestures)
+            
+            if not page_manager.needs_render():
+                return None
+            
+            frame = page_manager.render()
+            if frame is not None and args.flip:
+                frame = np.flip(np.flip(frame, 0), 1)  # Flip both horizontally and vertically
+            return frame
+        
+        first_frame_sent = False
+        
+        def send_frame(frame):
+            nonlocal first_frame_sent
+            start = time.perf_counter()
+            display.send_frame(frame)
+            metrics.record("display.send_frame", time.perf_counter() - start)
+            
+            if not first_frame_sent:
+                first_frame_sent = True
+                startup_time = time.monotonic() - start_time
+                metrics.record("startup.first_frame", startup_time)
+                print(f"First frame sent {startup_time:.3f}s after start", flush=True)
+        
+        def idle_delay():
+            # the display may still have deferred flips or discs landing after the page is done,
+            # and models left loaded by a camera page are released by the next capture_camera_frame
+            delays = (page_manager.time_until_update(), display.time_until_service(), detection.time_until_release())
+            delays = [delay for delay in delays if delay is not None]
+            return min(delays) if delays else None
+        
+        def pace_frame(camera_features):
+            profiler.tick()
+            scheduler.wait()
+            
+            # camera pages are paced by capture, everything else sleeps until the page or the
+            # display is due or an input or MQTT message wakes the loop. Only a loop about to
+            # sleep builds the next page ahead
+            delay = idle_delay() if camera_features is None else 0.0
+            idle = delay is None or delay > scheduler.period
+            page_manager.prewarm(idle)
+            if idle:
+                scheduler.idle(delay, page_manager.wake_event)
+        
+        async def pace_frame_async(camera_features, wake_event):
+            profiler.tick()
+            await scheduler.wait_async()
+            
+            delay = idle_delay() if camera_features is None else 0.0
+            idle = delay is None or delay > scheduler.period
+            page_manager.prewarm(idle)
+            if idle:
+                await scheduler.idle_async(delay, wake_event)
+        
+        def report_stats(pipeline=None):
+            # the stage timings, then every registered source: scheduler, pages, commands,
+            # display, detection and, when running, pipeline
+            summary = metrics.summary()
+            for name, stats in summary.pop("stages").items():
+                print(f"Stage {name}: {stats}")
+            for name, stats in summary.pop("pipeline", {}).items():
+                print(f"Pipeline stage {name}: {stats}")
+            for name, stats in summary.items():
+                print(f"Source {name}: {stats}")
+            if pipeline is not None:
+                pipeline.reset_stats()
+        
+        def run_frame_loop():
+            scheduler.start()
+            last_report_time = time.monotonic()
+            
+            while not stop_event.is_set():
+                page_manager.process_commands()
+                camera_features = get_camera_features()
+                camera_frame = capture_camera_frame(camera_features)
+                face_landmarks, gestures = detect_features(camera_features, camera_frame)
                 
-                # Get metadata for current page, safely handling None case
-                metadata = page_manager.get_page_metadata(page_manager.current_page_id)
-                camera_features = metadata.get("camera_features") if metadata else None
+                frame = render_frame(camera_frame, face_landmarks, gestures)
+                if frame is not None:
+                    send_frame(frame)
+                display.service()
                 
-                if camera_features is not None:
-                    if camera_initialized:
-                        try:
-                            camera_frame = camera_module.get_frame(debug=args.debug)
-                        except Exception as e:
-                            print(f"Error getting camera frame: {e}")
-                    
-                    if "landmark_detection" in camera_features:
-                        if camera_frame is not None and hasattr(camera_module, 'get_face_landmarks'):
-                            try:
-                                face_landmarks = camera_module.get_face_landmarks(camera_frame)
-                            except Exception as e:
-                                print(f"Error getting face landmarks: {e}")
-                    
-                    if "gesture_detection" in camera_features:
-                        if camera_frame is not None and gesture_initialized:
-                            try:
-                                gestures = gesture_module.detect_gestures(camera_frame)
-                                
-                                # Process gestures for navigation
-                                if gestures:
-                                    input_manager.process_gestures(gestures)
-                            except Exception as e:
-                                print(f"Error detecting gestures: {e}")
+                pace_frame(camera_features)
                 
-                # update the page
-                page_manager.update(camera_frame, face_landmarks, gestures)
-                frame = page_manager.render()
-
-                if args.flip:
-                    frame = np.flip(np.flip(frame, 0), 1)  # Flip both horizontally and vertically
+                if args.debug and time.monotonic() - last_report_time >= 10.0:
+                    last_report_time = time.monotonic()
+                    report_stats()
         
-                if frame is not None:
-                    display.send_frame(frame)
+        def run_pipeline():
+            # capture, inference and page render each run on their own thread, joined by
+            # latest-value mailboxes, so the frame rate is set by the slowest stage. The render
+            # stage sends its own frames, send_frame only hands them to the display's writers
+            pipeline = Pipeline()
+            last_detection = [None, (None, None, None)]
+            capture_idle = False
+            
+            def pace_capture():
+                # no camera page, or a camera that keeps failing: back off rather than spin. As a
+                # pace hook the wait does not count towards the stage's busy time
+                if capture_idle:
+                    stop_event.wait(DC.PIPELINE_IDLE_INTERVAL)
+            
+            def capture_stage(_):
+                nonlocal capture_idle
+                camera_features = get_camera_features()
+                camera_frame = capture_camera_frame(camera_features)
+                capture_idle = camera_frame is None
+                if camera_frame is None:
+                    return None
+                return page_manager.current_page_id, camera_features, camera_frame
+            
+            def inference_stage(item):
+                page_id, camera_features, camera_frame = item
+                face_landmarks, gestures = detect_features(camera_features, camera_frame)
+                return page_id, (camera_frame, face_landmarks, gestures)
+            
+            def render_stage(item):
+                # the render thread owns the pages, so it is the one to apply posted commands
+                page_manager.process_commands()
                 
-                # limit the frame rate to 30 FPS
-                elapsed = time.time() - last_frame_time
-                if elapsed < 1/30:
-                    time.sleep(1/30 - elapsed)
+                # keep feeding the newest detection to the page until a fresher one arrives
+                if item is not None:
+                    last_detection[:] = item
                 
-                last_frame_time = time.time()
+                if last_detection[0] == page_manager.current_page_id:
+                    camera_frame, face_landmarks, gestures = last_detection[1]
+                else:
+                    camera_frame, face_landmarks, gestures = None, None, None
+                frame = render_frame(camera_frame, face_landmarks, gestures)
+                if frame is not None:
+                    send_frame(frame)
+                display.service()
+            
+            pipeline.add_stage("capture", capture_stage, source=True, pace=pace_capture)
+            pipeline.add_stage("inference", inference_stage)
+            pipeline.add_stage("render", render_stage, input_timeout=0, pace=lambda: pace_frame(get_camera_features()))
+            metrics.register_source("pipeline", pipeline.get_stats)
+            
+            scheduler.start()
+            pipeline.start()
+            try:
+                while not stop_event.wait(10.0):
+                    if args.debug:
+                        report_stats(pipeline)
+            finally:
+                page_manager.wake()
+                pipeline.stop()
+        
+        async def run_async():
+            # frame ticks, sensor polling, status publishing and MQTT I/O share one event loop, so
+            # page changes all happen on this thread. Camera work and frame transmission go to
+            # single-thread executors so their libraries always see the same thread
+            loop = asyncio.get_running_loop()
+            wake_event = asyncio.Event()
+            camera_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+            transmit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transmit")
+            
+            page_manager.on_wake = lambda: loop.call_soon_threadsafe(wake_event.set)
+            input_manager.dispatch = loop.call_soon_threadsafe
+            
+            mqtt_manager.initialize(loop=loop)
+            tasks = [asyncio.create_task(input_manager.poll_sensors_async())]
+            
+            def capture_and_detect(camera_features):
+                camera_frame = capture_camera_frame(camera_features)
+                face_landmarks, gestures = detect_features(camera_features, camera_frame)
+                return camera_frame, face_landmarks, gestures
+            
+            scheduler.start()
+            last_report_time = time.monotonic()
+            
+            try:
+                while not stop_event.is_set():
+                    page_manager.process_commands()
+                    camera_features = get_camera_features()
+                    camera_frame, face_landmarks, gestures = None, None, None
+                    # also runs while models are loaded but unused, so they get released on time
+                    if camera_features is not None or detection.active:
+                        camera_frame, face_landmarks, gestures = await loop.run_in_executor(camera_executor, capture_and_detect, camera_features)
+                    
+                    frame = render_frame(camera_frame, face_landmarks, gestures)
+                    if frame is not None:
+                        await loop.run_in_executor(transmit_executor, send_frame, frame)
+                    if display.time_until_service() == 0:
+                        await loop.run_in_executor(transmit_executor, display.service)
+                    
+                    await pace_frame_async(camera_features, wake_event)
+                    
+                    if args.debug and time.monotonic() - last_report_time >= 10.0:
+                        last_report_time = time.monotonic()
+                        report_stats()
+            finally:
+                page_manager.on_wake = None
+                input_manager.dispatch = None
+                for task in tasks:
+                    task.cancel()
+                await mqtt_manager.cleanup_async()
+                camera_executor.shutdown(wait=True)
+                transmit_executor.shutdown(wait=True)
+        
+        def run_async_runtime():
+            asyncio.run(run_async())
+        
+        if args.pipeline:
+            run_runtime = run_pipeline
+        elif args.asyncio:
+            run_runtime = run_async_runtime
+        else:
+            run_runtime = run_frame_loop
+        
+        # a windowed simulator, on its own or as a tee sink, pumps input and redraws on this thread
+        event_display = display.find_sink('run_event_loop') if args.tee else display
+        
+        def run_frame_thread():
+            try:
+                run_runtime()
+            except Exception as e:
+                print(f"Error in frame loop: {e}")
+                traceback.print_exc()
+            finally:
+                event_display.stop_event_loop()
+        
+        frame_thread = None
+        try:
+            if hasattr(event_display, 'run_event_loop') and not args.headless:
+                # the simulator pumps input and redraws on this thread, frames are produced on a worker
+                frame_thread = threading.Thread(target=run_frame_thread, name="frame-loop")
+                frame_thread.daemon = True
+                frame_thread.start()
+                event_display.run_event_loop()
+            else:
+                run_runtime()
         
         except KeyboardInterrupt:
             print("Interrupted by user")
         finally:
+            # however the loop ended, the frame thread must be out of send_frame and the pages
+            # before they are torn down
+            stop_event.set()
+            page_manager.wake()
+            if frame_thread is not None:
+                frame_thread.join(timeout=1.0)
+            
             # Cleanup
             page_manager.cleanup()
             input_manager.cleanup()
@@ -182,11 +435,7 @@ def main():
             if mqtt_manager is not None:
                 mqtt_manager.cleanup()   
 
-            if camera_initialized and hasattr(camera_module, 'cleanup'):
-                camera_module.cleanup()
-            
-            if gesture_initialized and hasattr(gesture_module, 'cleanup'):
-                gesture_module.cleanup()
+            detection.release_all()
     
     except Exception as e:
         # Add more detailed error information
@@ -1,21 +1,17 @@
-# Import pages to register
-from pages.emoji import EmojiPage
-from pages.sketchpad import SketchpadPage
-from pages.pattern import PatternPage
-
-# Page registry with metadata
+# Page registry with metadata. Pages are named as "module:Class" and PageManager imports them
+# the first time they are shown, so their dependencies only load when needed
 PAGES = {
-    "pattern": (PatternPage, {
+    "pattern": ("pages.pattern:PatternPage", {
         "name": "PatternPage",
         "description": "Digital or analog clock",
         "camera_features": None
     }),
-    "emoji": (EmojiPage, {
+    "emoji": ("pages.emoji:EmojiPage", {
         "name": "Emoji Face",
         "description": "Face reactions based on camera input",
         "camera_features": ["landmark_detection", "gesture_detection"]
     }),
-    "sketchpad": (SketchpadPage, {
+    "sketchpad": ("pages.sketchpad:SketchpadPage", {
         "name": "Sketchpad",
         "description": "Draw from webpage",
         "camera_features": None
@@ -4,11 +4,15 @@ from abc import ABC, abstractmethod
 class BasePage(ABC):
     """Base class for all pages."""
     
+    # whether PageManager may keep the page suspended when switching away instead of cleaning it up
+    cacheable = True
+    
     def __init__(self, display_adapter):
         self.display_adapter = display_adapter
         self.width = display_adapter.width
         self.height = display_adapter.height
         self.frame = np.zeros((self.height, self.width), dtype=np.uint8)
+        self.dirty = True
     
     def initialize(self):
         pass
@@ -24,12 +28,58 @@ class BasePage(ABC):
     def cleanup(self):
         pass
     
+    def suspend(self):
+        """Called when another page is shown and this one is kept for later. Stop or give back
+        anything that should not run or be held in the background; cleanup() still follows
+        if the page is evicted."""
+        pass
+    
+    def resume(self):
+        """Called when a suspended page is shown again, in place of a new initialize(). The
+        display shows another page's frame by now, so the page is redrawn."""
+        self.mark_dirty()
+    
+    def prewarm(self, submit):
+        """Called from the frame loop while the page is shown. A page can build what it is likely
+        to need next with submit(work, *args), which runs work on a background thread and
+        returns a concurrent.futures.Future."""
+        pass
+    
+    def memory_usage(self):
+        """Estimated bytes held by the page, used to bound the suspended-page cache. Counts the
+        numpy arrays on the page and on pages it contains, override for anything larger."""
+        total = 0
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                total += value.nbytes
+            elif isinstance(value, BasePage):
+                total += value.memory_usage()
+        return total
+    
+    def mark_dirty(self):
+        self.dirty = True
+    
+    def mark_clean(self):
+        self.dirty = False
+    
+    def is_dirty(self):
+        """True when the rendered frame may differ from the last one sent. The drawing helpers
+        mark the page dirty, pages that assign self.frame directly must call mark_dirty()."""
+        return self.dirty
+    
+    def next_update_time(self):
+        """Wall-clock time the page next changes on its own, None when it only changes on input.
+        The default asks to be updated every frame."""
+        return 0.0
+    
     def clear_frame(self):
         self.frame = np.zeros((self.height, self.width), dtype=np.uint8)
+        self.dirty = True
     
     def set_pixel(self, x, y, value):
         if 0 <= x < self.width and 0 <= y < self.height:
             self.frame[y, x] = value
+            self.dirty = True
     
     def get_pixel(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
@@ -38,6 +88,7 @@ class BasePage(ABC):
     
     def invert(self):
         self.frame = 1 - self.frame
+        self.dirty = True
         
     def handle_secondary_button(self):
         print(f"Secondary button pressed on {self.__class__.__name__}")
@@ -16,32 +16,19 @@ class EmojiPage(BasePage):
         
         self.last_face_bounds = None
         self.scaling_factors = None
-        
-        # FPS tracking debug
-        self.frame_count = 0
-        self.start_time = time.time()
-        self.fps = 0
     
     def initialize(self):
         self.clear_frame()
         self.frame = self.default_face.copy()
-        self.start_time = time.time()
-        self.frame_count = 0
     
     def update(self, camera_frame=None, face_landmarks=None, gestures=None):
         current_time = time.time()
         
-        self.frame_count += 1
-        elapsed = current_time - self.start_time
-        if elapsed >= 5:  # Print every 5 seconds
-            self.fps = self.frame_count / elapsed
-            self.frame_count = 0
-            self.start_time = current_time
-        
         if current_time - self.last_update_time < self.update_interval:
             return
         
         self.last_update_time = current_time
+        self.mark_dirty()
         
         has_face_data = face_landmarks is not None and len(face_landmarks) > 0
         
@@ -58,6 +45,9 @@ class EmojiPage(BasePage):
     def render(self):
         return self.frame
     
+    def next_update_time(self):
+        return self.last_update_time + self.update_interval
+    
     def _create_default_face(self):
         face = np.zeros((self.face_height, self.width), dtype=np.uint8)
         
@@ -14,6 +14,7 @@ class PatternPage(BasePage):
         self.current_pattern_index = 0
         self.current_pattern_key = self.pattern_keys[self.current_pattern_index]
         self.current_pattern = self.pattern_classes[self.current_pattern_key](display_adapter)
+        self.prewarmed_patterns = {}  # pattern key -> Future of a pattern built ahead
         
         self.pattern_speed = 2.0
         self.min_speed = 0.5
@@ -29,6 +30,31 @@ class PatternPage(BasePage):
     def render(self):
         return self.current_pattern.render()
     
+    def is_dirty(self):
+        return self.current_pattern.is_dirty()
+    
+    def mark_clean(self):
+        self.current_pattern.mark_clean()
+    
+    def next_update_time(self):
+        return self.current_pattern.next_update_time()
+    
+    def suspend(self):
+        self.current_pattern.suspend()
+    
+    def prewarm(self, submit):
+        # build the pattern the secondary button switches to next
+        next_key = self.pattern_keys[(self.current_pattern_index + 1) % len(self.pattern_keys)]
+        if next_key != self.current_pattern_key and next_key not in self.prewarmed_patterns:
+            self.prewarmed_patterns[next_key] = submit(self._build_pattern, next_key)
+    
+    def cleanup(self):
+        self.current_pattern.cleanup()
+        self._discard_prewarmed()
+    
+    def resume(self):
+        self.current_pattern.resume()
+    
     def handle_secondary_button(self):
         self.next_pattern()
     
@@ -50,11 +76,19 @@ class PatternPage(BasePage):
             if hasattr(self.current_pattern, 'cleanup'):
                 self.current_pattern.cleanup()
             
-            self.current_pattern_key = pattern_key
-            self.current_pattern = self.pattern_classes[pattern_key](self.display_adapter)
+            pattern = None
+            future = self.prewarmed_patterns.pop(pattern_key, None)
+            if future is not None:
+                try:
+                    pattern = future.result()
+                except Exception as e:
+                    print(f"Error prewarming pattern '{pattern_key}': {e}")
+            # only the pattern after this one is worth keeping
+            self._discard_prewarmed()
             
-            if hasattr(self.current_pattern, 'initialize'):
-                self.current_pattern.initialize()
+            self.current_pattern_key = pattern_key
+            self.current_pattern_index = self.pattern_keys.index(pattern_key)
+            self.current_pattern = pattern if pattern is not None else self._build_pattern(pattern_key)
             
             if hasattr(self.current_pattern, 'speed'):
                 self.current_pattern.speed = self.pattern_speed
@@ -62,6 +96,18 @@ class PatternPage(BasePage):
             return True
         return False
 
+    def _discard_prewarmed(self):
+        # built patterns are cleaned up like the current one, those still building once done
+        for future in self.prewarmed_patterns.values():
+            future.add_done_callback(_cleanup_built_pattern)
+        self.prewarmed_patterns.clear()
+    
+    def _build_pattern(self, pattern_key):
+        pattern = self.pattern_classes[pattern_key](self.display_adapter)
+        if hasattr(pattern, 'initialize'):
+            pattern.initialize()
+        return pattern
+    
     def set_pattern_by_id(self, pattern_id):
         pattern_map = {
             1: "clock",
@@ -79,4 +125,15 @@ class PatternPage(BasePage):
     def set_speed(self, speed):
         self.pattern_speed = float(speed)
         if hasattr(self.current_pattern, 'speed'):
-            self.current_pattern.speed = self.pattern_speed
\ No newline at end of file
+            self.current_pattern.speed = self.pattern_speed
+
+
+def _cleanup_built_pattern(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    pattern = future.result()
+    if hasattr(pattern, 'cleanup'):
+        try:
+            pattern.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up prewarmed pattern: {e}")
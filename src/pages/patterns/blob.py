@@ -118,4 +118,7 @@ class BlobPattern(BasePage):
                         self.set_pixel(x, y, 1)
 
     def render(self):
-        return self.frame
\ No newline at end of file
+        return self.frame
+    
+    def next_update_time(self):
+        return self.last_update_time + 0.05 / self.speed
\ No newline at end of file
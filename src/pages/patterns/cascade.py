@@ -34,8 +34,6 @@ class CascadePattern(BasePage):
         self._update_intervals()
 
     def update(self, camera_frame=None, face_landmarks=None, gestures=None):
-        self.clear_frame()
-        
         speed_factor = self.speed
         current_time = time.time() * 1000
         
@@ -87,11 +85,15 @@ class CascadePattern(BasePage):
                 adjusted_min_interval,
                 self.current_interval * acceleration_factor
             )
-        
-        for index in self.all_discs:
-            row = index // self.width
-            col = index % self.width
-            self.set_pixel(col, row, 1)
+            
+            self.clear_frame()
+            for index in self.all_discs:
+                row = index // self.width
+                col = index % self.width
+                self.set_pixel(col, row, 1)
             
     def render(self):
-        return self.frame
\ No newline at end of file
+        return self.frame
+    
+    def next_update_time(self):
+        return (self.last_flip_time + self.current_interval) / 1000
\ No newline at end of file
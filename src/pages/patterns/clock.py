@@ -11,6 +11,7 @@ class ClockPattern(BasePage):
         super().__init__(display_adapter)
         self.speed = 1.0  # update every second
         self.last_update_time = 0
+        self.time_str = None
         self.font_size = 15
         self.matrix_size = 11
 
@@ -18,15 +19,24 @@ class ClockPattern(BasePage):
             self.font_name = '/usr/share/fonts/truetype/msttcorefonts/Arial_Bold.ttf'
         else:
             self.font_name = 'Arial Bold'  # this will work on macOS
+        self.font = None
+
+    def initialize(self):
+        self._load_font()
+
+    def _load_font(self):
+        # looked up once rather than for every digit drawn
+        if self.font is None:
+            try:
+                self.font = ImageFont.truetype(self.font_name, self.font_size)
+            except:
+                self.font = ImageFont.load_default()
+        return self.font
 
     def convert_char_to_bitmap(self, char: str) -> np.matrix:
         matrix = np.zeros((self.matrix_size, self.matrix_size), dtype=np.uint8)
 
-        try:
-            font = ImageFont.truetype(self.font_name, self.font_size)
-        except:
-            font = ImageFont.load_default()
-            
+        font = self._load_font()
         image = Image.new('L', (self.font_size, self.font_size), color=0)
         draw = ImageDraw.Draw(image)
         draw.text((0, 0), char, font=font, fill=255)
@@ -64,15 +74,23 @@ class ClockPattern(BasePage):
             
         self.last_update_time = current_time
         
-        self.clear_frame()
-        clock_matrix = self.generate_clock_matrix()
+        # the face only changes once a minute, skip redrawing the same digits
+        time_str = datetime.now().strftime("%H%M")
+        if time_str == self.time_str:
+            return
+        self.time_str = time_str
         
-        for y in range(self.height):
-            for x in range(self.width):
-                self.set_pixel(x, y, clock_matrix[y, x])
+        self.frame = self.generate_clock_matrix()
+        self.mark_dirty()
 
     def render(self):
         return self.frame
+    
+    def next_update_time(self):
+        if self.time_str is None:
+            return self.last_update_time + 1.0 / self.speed
+        # next minute rollover
+        return (time.time() // 60 + 1) * 60
         
     def handle_slider_change(self, value):
         print("speed not used by clock")
\ No newline at end of file
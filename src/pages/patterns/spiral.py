@@ -61,4 +61,7 @@ class SpiralPattern(BasePage):
                 break
     
     def render(self):
-        return self.frame
\ No newline at end of file
+        return self.frame
+    
+    def next_update_time(self):
+        return self.last_update_time + 0.2 / self.speed
\ No newline at end of file
@@ -41,6 +41,9 @@ class WavesPattern(BasePage):
     
     def render(self):
         return self.frame
+    
+    def next_update_time(self):
+        return self.last_update_time + 0.2 / self.speed
 
     def handle_slider_change(self, value):
         min_speed = 0.5
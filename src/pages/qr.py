@@ -13,10 +13,7 @@ class QRCodePage(BasePage):
         self.token = None
         self.last_update_time = 0
         self.refresh_interval = 60.0  # Refresh token every minute
-        self.token_folder = "tokens"  # Add token folder path
-        
-        # Ensure token folder exists
-        os.makedirs(self.token_folder, exist_ok=True)
+        self.token_folder = "tokens"  # created with the first token, not when the page is built
     
     def initialize(self):
         self.clear_frame()
@@ -36,6 +33,9 @@ class QRCodePage(BasePage):
         else:
             return self.frame
     
+    def next_update_time(self):
+        return self.last_update_time + self.refresh_interval
+    
     def _generate_qr_code(self):
         try:
             self.last_update_time = time.time()
@@ -79,6 +79,7 @@ class QRCodePage(BasePage):
             final_matrix[0:27, 0:27] = bordered_matrix
 
             self.qr_matrix = final_matrix
+            self.mark_dirty()
         except Exception as e:
             print(f"Error generating QR code: {e}")
             import traceback
@@ -102,6 +103,7 @@ class QRCodePage(BasePage):
         
         token_file = os.path.join(self.token_folder, f"{token}.json")
         try:
+            os.makedirs(self.token_folder, exist_ok=True)
             with open(token_file, 'w') as f:
                 json.dump(token_data, f)
         except Exception as e:
@@ -20,35 +20,37 @@ class SketchpadPage(BasePage):
         self.drawing = None
         self.last_drawing_time = 0
         self.token = None
+        self.token_expires = 0
         self.drawing_timeout = 300  # show drawing for 5 minutes before returning to QR
+        self.last_poll_time = 0
+        self.poll_interval = 1.0  # check the drawing server once a second
         self.token_folder = "tokens"
         self.drawing_folder = "drawings"
-        
-        os.makedirs(self.token_folder, exist_ok=True)
-        os.makedirs(self.drawing_folder, exist_ok=True)
     
     def initialize(self):
+        # the token, its file and the first poll of the drawing server wait for the first
+        # update, so a page built ahead in the background does none of it until it is shown
         self.clear_frame()
-        
-        self.token = self._generate_token()
-        self._save_token(self.token)
-        print(f"SketchpadPage generated token: {self.token}")
-        
         self.qr_page.url = "https://chaelchia.com/flip/draw"
-        self.qr_page.token = self.token
-        self.qr_page.initialize()
-        
         self.mode = MODE_QR
-        self._check_for_new_drawing()
     
     def update(self, camera_frame=None, face_landmarks=None, gestures=None):
         current_time = time.time()
         
         if self.mode == MODE_QR:
+            # also replaces a token that expired while the page was suspended
+            if current_time >= self.token_expires:
+                self.token = self._generate_token()
+                self._save_token(self.token)
+                print(f"SketchpadPage generated token: {self.token}")
+                
+                self.qr_page.token = self.token
+                self.qr_page.initialize()
+            
             self.qr_page.update(camera_frame, face_landmarks, gestures)
             
             # check for new drawings from qr code
-            if self._check_for_new_drawing():
+            if current_time - self.last_poll_time >= self.poll_interval and self._check_for_new_drawing():
                 self.mode = MODE_DRAWING_QR
                 self.last_drawing_time = current_time
         
@@ -65,7 +67,8 @@ class SketchpadPage(BasePage):
                 self.qr_page.initialize()
                 self.mode = MODE_QR
             
-            self._check_for_new_drawing()
+            if current_time - self.last_poll_time >= self.poll_interval:
+                self._check_for_new_drawing()
     
     def render(self):
         if self.mode == MODE_QR:
@@ -76,6 +79,23 @@ class SketchpadPage(BasePage):
             return self.frame
         return self.frame
     
+    def is_dirty(self):
+        if self.mode == MODE_QR:
+            return self.dirty or self.qr_page.is_dirty()
+        return self.dirty
+    
+    def mark_clean(self):
+        self.dirty = False
+        self.qr_page.mark_clean()
+    
+    def next_update_time(self):
+        next_poll = self.last_poll_time + self.poll_interval
+        if self.mode == MODE_QR:
+            return min(next_poll, self.qr_page.next_update_time())
+        elif self.mode == MODE_DRAWING_QR:
+            return min(next_poll, self.last_drawing_time + self.drawing_timeout)
+        return None
+    
     def _generate_token(self, length=6):
         letters = string.ascii_letters + string.digits
         return ''.join(random.choice(letters) for _ in range(length))
@@ -87,15 +107,19 @@ class SketchpadPage(BasePage):
             "expires": time.time() + 3600,  # Token valid for 1 hour
             "used": False
         }
+        self.token_expires = token_data["expires"]
         
         token_file = os.path.join(self.token_folder, f"{token}.json")
         try:
+            os.makedirs(self.token_folder, exist_ok=True)
+            os.makedirs(self.drawing_folder, exist_ok=True)
             with open(token_file, 'w') as f:
                 json.dump(token_data, f)
         except Exception as e:
             print(f"Error saving token: {e}")
     
     def _check_for_new_drawing(self) -> bool:
+        self.last_poll_time = time.time()
         try:            
             response = requests.get(f"http://localhost:5000/api/current_drawing/{self.token}")
             
@@ -107,6 +131,7 @@ class SketchpadPage(BasePage):
                     self.frame = drawing_matrix
                     self.last_drawing_time = time.time()
                     self.mode = MODE_DRAWING_QR
+                    self.mark_dirty()
                     return True
             
         except Exception as e:
@@ -123,6 +148,7 @@ class SketchpadPage(BasePage):
             self.frame = drawing_matrix
             self.last_drawing_time = time.time()
             self.mode = MODE_DRAWING_MQTT
+            self.mark_dirty()
             return True
             
         except Exception as e:
@@ -8,7 +8,14 @@ class DisplayConstants:
     PANEL_3_ID=8
 
     FRAME_HEADER = 128
-    FRAME_COMMAND = 131
+    FRAME_COMMAND = 131  # 28 column bytes, shown immediately
+    FRAME_COMMAND_NO_REFRESH = 132  # 28 column bytes, held until a refresh
+    REFRESH_COMMAND = 130  # broadcast, shows all held data at once
+    # panel length in column bytes -> (show immediately, hold until refresh) commands
+    DATA_COMMANDS = {
+        28: (131, 132),
+        56: (133, 134),
+    }
     FRAME_TAIL = 143
     FRAME_COMMAND_START_INDEX = 3
     FRAME_COMMAND_END_INDEX = 31
@@ -21,6 +28,12 @@ class DisplayConstants:
     PANEL_ROW_HEIGHT_COUNT = 28
     ROW_DISC_HEIGHT_COUNT = 1
 
+    FRAME_RATE = 30  # main loop target frames per second
+    FRAME_STATS_HISTORY = 300  # frames kept for jitter and budget percentiles
+    MAX_IDLE_INTERVAL = 1.0  # longest the main loop sleeps when no page, input or MQTT work is due
+    PIPELINE_IDLE_INTERVAL = 0.1  # how often the pipeline's capture stage checks for a camera page
+    TEE_QUEUE_SIZE = 4  # frames buffered per sink before the oldest is dropped
+
     DISPLAY_DISC_WIDTH_COUNT = DISPLAY_PANEL_WIDTH_COUNT * PANEL_ROW_WIDTH_COUNT * ROW_DISC_WIDTH_COUNT
     DISPLAY_DISC_HEIGHT_COUNT = DISPLAY_PANEL_HEIGHT_COUNT * PANEL_ROW_HEIGHT_COUNT * ROW_DISC_HEIGHT_COUNT
 
@@ -40,6 +53,37 @@ class SimConstants:
     DISC_TOP = 1
     DISC_BOTTOM = 0
     SIM_FPS = 30
+    SIM_EVENT_FPS = 120  # input and redraw rate of the simulator's own event loop
+
+    # model the serial transfer and disc mechanics so discs change when they would on the real frame
+    BUS_TIMING = False
+    DISC_FLIP_TIME = 0.005  # seconds from packet received to disc settled
+
+class RecordConstants:
+    LOG_MAX_BYTES = 64 * 1024 * 1024  # rotate the frame log at this size, 0 disables
+    LOG_BACKUP_COUNT = 8
+    FLUSH_INTERVAL = 1.0  # seconds
+
+class MetricsConstants:
+    HISTORY = 1024  # samples kept per stage for percentiles
+    PUBLISH_INTERVAL = 10.0  # seconds between metrics messages over MQTT
+
+class DetectionConstants:
+    IDLE_RELEASE_TIMEOUT = 60.0  # seconds without a page using the camera or a model before it is released
+    RETRY_INTERVAL = 30.0  # seconds before retrying a camera or model that failed to load
+
+class ProfileConstants:
+    OUTPUT_DIR = "profiles"
+    MODE = "sample"  # "sample" for all threads, "cprofile" for the frame loop only
+    DURATION = 10.0  # seconds
+    MAX_DURATION = 120.0
+    SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    TOP_FUNCTIONS = 25  # entries in the summary written next to the profile
+
+class PageConstants:
+    CACHE_SIZE = 4  # suspended pages kept for a fast switch back, 0 rebuilds pages on every switch
+    CACHE_MAX_BYTES = 16 * 1024 * 1024  # suspended pages are evicted past this estimated size
+    PREWARM = True  # build the likely next page and pattern in the background ahead of a switch
 
 class HardwareConstants:
     # pinouts
@@ -58,4 +102,19 @@ class HardwareConstants:
 
     # serial config
     SERIAL_BAUDRATE = 19200
-    SERIAL_PORT_NAME="/dev/ttyAMA0"
\ No newline at end of file
+    SERIAL_PORT_NAME="/dev/ttyAMA0"
+    SERIAL_BITS_PER_BYTE = 10  # start + 8 data + stop
+    SERIAL_PACKET_GAP = 0.002  # idle time the panel controllers need between writes
+
+    # resend every panel periodically in case a packet was lost, 0 disables
+    FULL_REFRESH_INTERVAL = 30.0
+
+    # stage panel data with the no-refresh command and show it with one broadcast refresh.
+    # The refresh is broadcast per bus, so with several buses each bus switches on its own
+    ATOMIC_REFRESH = False
+
+    # flip budget to keep current spikes on the 24V supply down, 0 disables a cap
+    MAX_FLIPS_PER_FRAME = 0
+    MAX_FLIPS_PER_PANEL = 0
+    FLIP_ORDER = "raster"  # raster, random or nearest
+    FLIP_SPREAD_INTERVAL = 1 / 30  # seconds between frames that drain deferred flips
\ No newline at end of file